@@ -1,18 +1,135 @@
 """Changelog generation using Claude AI"""
 
+import functools
+import json
 import logging
 import os
 import re
-from typing import Any, Dict, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 import yaml
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from exceptions import GenerationError
+
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _SafeLoader
 
 logger = logging.getLogger(__name__)
 
+# Matches a ```yaml ... ``` (or bare ```) code block in Claude's response
+_YAML_FENCE_RE = re.compile(r"```(?:yaml)?\s*\n(.*?)\n```", re.DOTALL)
+
+
+def _parse_entry(text: str) -> Any:
+    """Parse a generated entry, trying the JSON fast path before YAML.
+
+    YAML is a superset of JSON, so JSON-style output can skip the YAML loader.
+
+    Args:
+        text: Generated entry text
+
+    Returns:
+        Parsed entry
+
+    Raises:
+        yaml.YAMLError: If the text is not valid YAML
+    """
+    if text.startswith("{"):
+        try:
+            return json.loads(text)
+        except ValueError:
+            pass
+    return yaml.load(text, Loader=_SafeLoader)
+
+
+# Start of each file section in a unified git diff
+_DIFF_FILE_RE = re.compile(r"^diff --git ", re.MULTILINE)
+
+# Generated or binary files whose diffs carry no useful changelog information
+_SKIPPED_DIFF_SUFFIXES = (
+    "package-lock.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "poetry.lock",
+    "Cargo.lock",
+    "go.sum",
+    ".min.js",
+    ".svg",
+)
+
+# Rough characters-per-token ratio used to apply token budgets to diff text
+CHARS_PER_TOKEN = 4
+
+# Configuration-dependent part of the user message. It is identical for every PR
+# in a repository, so it is sent first as a cacheable prefix.
+_USER_MESSAGE_STATIC_TEMPLATE = """Generate a logchange changelog entry for the pull request described below.
+
+**Allowed entry types:**
+{types_list}
+
+**Language:**
+{language_section}
+
+**Validation Rules:**
+{rules_section}"""
+
+# Shorter prefix used with the default system prompt, which already lists the
+# allowed types and forbidden fields; only the required fields are added here
+_USER_MESSAGE_STATIC_BRIEF_TEMPLATE = """Generate a logchange changelog entry for the pull request described below.
+Use only the entry types and fields allowed by the validation rules in the system prompt.
+
+**Language:**
+{language_section}
+
+**Validation Rules:**
+- REQUIRED fields: {required_fields}"""
+
+# PR-specific part of the user message, sent after the static prefix
+_USER_MESSAGE_TEMPLATE = """**PR Title:** {pr_title}
+
+**PR Description:**
+{pr_body}
+
+**Primary Author:** {pr_author}
+{author_url_line}
+
+{authors_section}
+
+**Labels:** {labels}
+
+**Changes:**
+```diff
+"""
+
+# Stands in for the diff when it couldn't be fetched
+_NO_DIFF_TEXT = "(no diff available)"
+
+# Follows the diff, which is sent as its own content block so it is never copied
+# into a formatted string
+_USER_MESSAGE_FOOTER_TEMPLATE = """
+```
+
+**IMPORTANT INSTRUCTIONS:**
+1. Always include the "authors" field with at least the primary author ({pr_author})
+2. The authors section must contain the PR author information
+3. Extract any additional authors from commit authors if available
+4. Generate a valid logchange YAML entry that accurately describes this change
+5. Make sure the generated YAML is valid and can be parsed directly
+6. Output ONLY the YAML with no additional text"""
+
 
+@functools.lru_cache(maxsize=None)
 def _load_template(template_name: str) -> str:
-    """Load a prompt template from file.
+    """Load a prompt template from file (cached per template name).
 
     Args:
         template_name: Name of template file (without .txt extension)
@@ -28,16 +145,131 @@ def _load_template(template_name: str) -> str:
         with open(template_path, "r") as f:
             return f.read().strip()
     except FileNotFoundError:
-        logger.warning(f"Template file not found: {template_path}")
+        logger.warning("Template file not found: %s", template_path)
         return ""
     except IOError as e:
-        logger.error(f"Failed to load template {template_name}: {e}")
+        logger.error("Failed to load template %s: %s", template_name, e)
         return ""
 
 
+def build_validation_rules_section(
+    changelog_types: list, forbidden_fields: Optional[list] = None
+) -> str:
+    """
+    Build validation and self-inspection section with configured changelog types
+
+    Args:
+        changelog_types: List of allowed changelog types from configuration
+        forbidden_fields: List of fields that must not be used (from configuration)
+
+    Returns:
+        Validation rules section as a string
+    """
+    types_list = ", ".join(changelog_types)
+    forbidden_fields = forbidden_fields or []
+
+    # Standard fields that are always invalid (common mistakes/hallucinations)
+    invalid_fields_lines = [
+        "- references (not a valid logchange field)",
+        "- contributors (use authors instead)",
+        "- fixes (use issues instead)",
+    ]
+
+    # Add user-configured forbidden fields
+    for field in forbidden_fields:
+        invalid_fields_lines.append(f"- {field} (forbidden by configuration)")
+
+    # Build invalid fields section only if there are fields to list
+    invalid_fields_section = ""
+    if invalid_fields_lines:
+        invalid_fields_text = "\n".join(invalid_fields_lines)
+        invalid_fields_section = f"""
+INVALID FIELDS - DO NOT USE:
+{invalid_fields_text}
+"""
+
+    return f"""## YAML Field Validation Rules
+
+VALID LOGCHANGE FIELDS (only these allowed):
+- title (required, string, max 200 chars, break long titles at ~80 chars with YAML continuation)
+- type (required, must be one of: {types_list})
+- description (optional, string)
+- authors (required, list of {{name, nick?, url?}})
+- modules (optional, list of strings)
+- issues (optional, list of NUMBERS ONLY, no '#' symbol. Extract from PR description and legacy text)
+- links (optional, list of {{name, url}})
+- important_notes (optional, string)
+- merge_requests (optional, list of numbers){invalid_fields_section}
+## Self-Inspection Before Output
+
+BEFORE outputting the YAML, verify:
+1. title: Is it under 200 characters? If >80 chars, break it using YAML line continuation (|, >, or multi-line)
+2. type: Is it exactly one of the allowed types ({types_list})? NOT just "changed" for everything - be precise
+3. authors: Is it a list? Each entry has 'name' field? No extra/invalid fields?
+4. issues: Contains ONLY numbers (e.g., 123, not "#123")? Extracted from text like "Fixes #123" or "(#111)"?
+5. All fields: NO hallucinated fields or forbidden fields?
+6. YAML syntax: Valid YAML that parses without errors?
+
+If you find any violations, CORRECT THEM before outputting the final YAML.
+
+## Type Detection Guidelines
+
+Use the MOST SPECIFIC type from the allowed list above. Examples for common types:
+- "removed" for deletions, deprecations of features
+- "fixed" for bug fixes, corrections
+- "security" for security issues
+- "dependency_update" for dependency changes
+- "added" for new features only
+- "changed" for modifications that aren't fixes"""
+
+
+class _BoundedRetry(Retry):
+    """Retry policy that caps how long a Retry-After header can make it wait"""
+
+    # Longest wait honored from a single Retry-After header, in seconds
+    MAX_RETRY_AFTER = 30.0
+
+    def get_retry_after(self, response: Any) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.MAX_RETRY_AFTER)
+
+
 class ChangelogGenerator:
     """Generate changelog entries using Claude API"""
 
+    # (connect, read) timeout in seconds for Claude API requests
+    REQUEST_TIMEOUT = (10, 60)
+
+    # Retry rate limits, overload (529) and transient server errors with
+    # exponential backoff, honoring Retry-After up to MAX_RETRY_AFTER. Those
+    # responses mean the request wasn't processed, so POST is safe to resend.
+    # Read timeouts are not retried: the API may still be generating (or have
+    # created a batch), and resending would bill it twice. The final response
+    # is returned rather than raised so it is logged like any other API error.
+    RETRY = _BoundedRetry(
+        total=4,
+        read=0,
+        backoff_factor=1.5,
+        status_forcelist=(429, 500, 502, 503, 504, 529),
+        allowed_methods=frozenset(["HEAD", "GET", "POST"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+    # Sessions shared by all generators in the process, keyed by API key
+    _sessions: Dict[str, requests.Session] = {}
+    _sessions_lock = threading.Lock()
+
+    # Headers sent with every Claude API request (the API key is added per session)
+    BASE_HEADERS = MappingProxyType(
+        {
+            "anthropic-version": "2023-06-01",
+            "content-type": "application/json",
+        }
+    )
+
     @staticmethod
     def _get_default_system_prompt() -> str:
         """Get default system prompt, loading from template if available."""
@@ -83,75 +315,68 @@ Consider whether to add an 'important_notes' field to highlight:
 
 Only include 'important_notes' if the change significantly impacts users or requires attention during upgrades."""
 
-    def _build_validation_rules_section(
-        self, changelog_types: list, forbidden_fields: Optional[list] = None
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def _build_system_prompt(
+        system_prompt: Optional[str],
+        changelog_types: tuple,
+        forbidden_fields: tuple,
+        generate_important_notes: bool,
+        changelog_language: str,
     ) -> str:
         """
-        Build validation and self-inspection section with configured changelog types
+        Assemble the full system prompt from templates and configuration
+
+        Results are cached per configuration, so constructing several generators
+        with the same settings reads the templates and joins the sections once.
 
         Args:
-            changelog_types: List of allowed changelog types from configuration
-            forbidden_fields: List of fields that must not be used (from configuration)
+            system_prompt: Custom system prompt, or None to use the default
+            changelog_types: Allowed changelog types
+            forbidden_fields: Fields that must not be used
+            generate_important_notes: Whether to include the important_notes instruction
+            changelog_language: Language for the changelog entry
 
         Returns:
-            Validation rules section as a string
+            The assembled system prompt
         """
-        types_list = ", ".join(changelog_types)
-        forbidden_fields = forbidden_fields or []
-
-        # Standard fields that are always invalid (common mistakes/hallucinations)
-        invalid_fields_lines = [
-            "- references (not a valid logchange field)",
-            "- contributors (use authors instead)",
-            "- fixes (use issues instead)",
-        ]
-
-        # Add user-configured forbidden fields
-        for field in forbidden_fields:
-            invalid_fields_lines.append(f"- {field} (forbidden by configuration)")
+        lang_instruction = (
+            f"Write the entry in {changelog_language}."
+            if changelog_language != "English"
+            else ""
+        )
 
-        # Build invalid fields section only if there are fields to list
-        invalid_fields_section = ""
-        if invalid_fields_lines:
-            invalid_fields_text = "\n".join(invalid_fields_lines)
-            invalid_fields_section = f"""
-INVALID FIELDS - DO NOT USE:
-{invalid_fields_text}
-"""
+        # Determine if using custom system prompt
+        using_custom_prompt = system_prompt is not None
 
-        return f"""## YAML Field Validation Rules
+        prompt_parts = []
 
-VALID LOGCHANGE FIELDS (only these allowed):
-- title (required, string, max 200 chars, break long titles at ~80 chars with YAML continuation)
-- type (required, must be one of: {types_list})
-- description (optional, string)
-- authors (required, list of {{name, nick?, url?}})
-- modules (optional, list of strings)
-- issues (optional, list of NUMBERS ONLY, no '#' symbol. Extract from PR description and legacy text)
-- links (optional, list of {{name, url}})
-- important_notes (optional, string)
-- merge_requests (optional, list of numbers){invalid_fields_section}
-## Self-Inspection Before Output
+        # Always add base prompt (either custom or default)
+        if using_custom_prompt:
+            prompt_parts.append(system_prompt)
+        else:
+            prompt_parts.append(ChangelogGenerator._get_default_system_prompt())
 
-BEFORE outputting the YAML, verify:
-1. title: Is it under 200 characters? If >80 chars, break it using YAML line continuation (|, >, or multi-line)
-2. type: Is it exactly one of the allowed types ({types_list})? NOT just "changed" for everything - be precise
-3. authors: Is it a list? Each entry has 'name' field? No extra/invalid fields?
-4. issues: Contains ONLY numbers (e.g., 123, not "#123")? Extracted from text like "Fixes #123" or "(#111)"?
-5. All fields: NO hallucinated fields or forbidden fields?
-6. YAML syntax: Valid YAML that parses without errors?
+        # Add configuration-based sections only if using default prompt
+        # If user provides custom prompt, they need to handle these themselves
+        if not using_custom_prompt:
+            # Add validation and self-inspection guidelines with configured types and forbidden fields
+            prompt_parts.append(
+                build_validation_rules_section(
+                    list(changelog_types), list(forbidden_fields)
+                )
+            )
 
-If you find any violations, CORRECT THEM before outputting the final YAML.
+            # Add important_notes instruction if enabled
+            if generate_important_notes:
+                prompt_parts.append(
+                    ChangelogGenerator._get_important_notes_instruction()
+                )
 
-## Type Detection Guidelines
+        # Always add language instruction (even with custom prompt)
+        prompt_parts.append(lang_instruction)
 
-Use the MOST SPECIFIC type from the allowed list above. Examples for common types:
-- "removed" for deletions, deprecations of features
-- "fixed" for bug fixes, corrections
-- "security" for security issues
-- "dependency_update" for dependency changes
-- "added" for new features only
-- "changed" for modifications that aren't fixes"""
+        return "\n".join(p for p in prompt_parts if p).strip()
 
     def __init__(
         self,
@@ -167,6 +392,10 @@ Use the MOST SPECIFIC type from the allowed list above. Examples for common type
         generate_important_notes: bool = True,
         external_issue_regex: Optional[str] = None,
         external_issue_url_template: Optional[str] = None,
+        max_output_tokens: int = 1024,
+        stream_response: bool = True,
+        prewarm: bool = False,
+        skip_files_regex: Optional[str] = None,
     ):
         """
         Initialize changelog generator
@@ -184,12 +413,28 @@ Use the MOST SPECIFIC type from the allowed list above. Examples for common type
             generate_important_notes: Whether to instruct AI to generate important_notes
             external_issue_regex: Regex to detect external issues
             external_issue_url_template: URL template for external issues
+            max_output_tokens: Maximum tokens Claude may generate per response
+            stream_response: Stream the response as server-sent events instead of
+                waiting for the full JSON body
+            prewarm: Open the connection to the Claude API in the background
+                when a new session is created; only worth it when a request
+                is sure to follow
+            skip_files_regex: Regex of file paths whose diffs are left out of the prompt
         """
         self.api_key = api_key
         self.model = model
         self.changelog_language = changelog_language
         self.max_tokens_context = max_tokens_context
         self.max_tokens_per_file = max_tokens_per_file
+        self.max_output_tokens = max_output_tokens
+        self.stream_response = stream_response
+        self.prewarm = prewarm
+        self._skip_files_re = None
+        if skip_files_regex:
+            try:
+                self._skip_files_re = re.compile(skip_files_regex)
+            except re.error as e:
+                logger.warning("Invalid skip regex pattern: %s", e)
         self.generate_important_notes = generate_important_notes
         self.external_issue_regex = external_issue_regex
         self.external_issue_url_template = external_issue_url_template
@@ -206,56 +451,111 @@ Use the MOST SPECIFIC type from the allowed list above. Examples for common type
         self.mandatory_fields = mandatory_fields or ["title"]
         self.forbidden_fields = forbidden_fields or []
 
-        # Build system prompt
-        lang_instruction = (
-            f"Write the entry in {changelog_language}."
-            if changelog_language != "English"
-            else ""
+        # Build system prompt (memoized across instances with the same config)
+        self.system_prompt = self._build_system_prompt(
+            system_prompt,
+            tuple(self.changelog_types),
+            tuple(self.forbidden_fields),
+            self.generate_important_notes,
+            changelog_language,
         )
 
-        # Determine if using custom system prompt
-        using_custom_prompt = system_prompt is not None
-
-        prompt_parts = []
-
-        # Always add base prompt (either custom or default)
-        if using_custom_prompt:
-            prompt_parts.append(system_prompt)
+        # User-message prefix that only depends on configuration, marked as a
+        # cache breakpoint so it is served from cache along with the system prompt.
+        # The default system prompt already carries the full validation rules, so
+        # they are only repeated here when a custom system prompt is used.
+        self._rules_in_system = system_prompt is None
+        language_section = (
+            f"Write the changelog entry in {changelog_language}."
+            if changelog_language != "English"
+            else "English (default)"
+        )
+        if self._rules_in_system:
+            static_text = _USER_MESSAGE_STATIC_BRIEF_TEMPLATE.format_map(
+                {
+                    "language_section": language_section,
+                    "required_fields": ", ".join(self.mandatory_fields),
+                }
+            )
         else:
-            prompt_parts.append(self._get_default_system_prompt())
-
-        # Add configuration-based sections only if using default prompt
-        # If user provides custom prompt, they need to handle these themselves
-        if not using_custom_prompt:
-            # Add validation and self-inspection guidelines with configured types and forbidden fields
-            prompt_parts.append(
-                self._build_validation_rules_section(
-                    self.changelog_types, self.forbidden_fields
-                )
+            static_text = _USER_MESSAGE_STATIC_TEMPLATE.format_map(
+                {
+                    "types_list": ", ".join(self.changelog_types),
+                    "language_section": language_section,
+                    "rules_section": self._build_validation_rules(),
+                }
             )
+        self._static_user_block = {
+            "type": "text",
+            "text": static_text,
+            "cache_control": {"type": "ephemeral"},
+        }
+
+        # The system prompt is identical for every PR in a repository, so mark it
+        # as a prompt-cache breakpoint and let Anthropic serve it from cache
+        self._system_blocks = (
+            [
+                {
+                    "type": "text",
+                    "text": self.system_prompt,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ]
+            if self.system_prompt
+            else []
+        )
 
-            # Add important_notes instruction if enabled
-            if self.generate_important_notes:
-                prompt_parts.append(self._get_important_notes_instruction())
-
-        # Always add language instruction (even with custom prompt)
-        prompt_parts.append(lang_instruction)
-
-        self.system_prompt = "\n".join(p for p in prompt_parts if p).strip()
+        # Request fields that never change, serialized once (without the closing
+        # brace) so each request only has to encode its messages
+        static_fields = {"model": self.model, "max_tokens": self.max_output_tokens}
+        if self._system_blocks:
+            static_fields["system"] = self._system_blocks
+        if self.stream_response:
+            static_fields["stream"] = True
+        static_json = json.dumps(static_fields, separators=(",", ":"))
+        self._payload_prefix = static_json[:-1].encode("utf-8")
 
         self.api_url = "https://api.anthropic.com/v1/messages"
+        self.batches_url = self.api_url + "/batches"
         self._setup_session()
 
     def _setup_session(self) -> None:
-        """Set up HTTP session with authentication headers"""
-        self.session = requests.Session()
-        self.session.headers.update(
-            {
-                "x-api-key": self.api_key,
-                "anthropic-version": "2023-06-01",
-                "content-type": "application/json",
-            }
-        )
+        """Set up HTTP session with authentication headers
+
+        Sessions are shared per API key across generator instances, so every
+        request in the process reuses one pooled keep-alive connection to the
+        Claude API instead of repeating the TLS handshake. Transient failures
+        are retried by the mounted adapter according to RETRY.
+        """
+        with self._sessions_lock:
+            session = self._sessions.get(self.api_key)
+            if session is None:
+                session = requests.Session()
+                session.headers.update(self.BASE_HEADERS)
+                session.headers["x-api-key"] = self.api_key
+                session.mount(
+                    "https://",
+                    HTTPAdapter(
+                        max_retries=self.RETRY,
+                        pool_connections=4,
+                        pool_maxsize=8,
+                        pool_block=False,
+                    ),
+                )
+                self._sessions[self.api_key] = session
+                if self.prewarm:
+                    threading.Thread(
+                        target=self._prewarm, args=(session,), daemon=True
+                    ).start()
+        self.session = session
+
+    def _prewarm(self, session: requests.Session) -> None:
+        """Open the pooled TLS connection ahead of the first generate() call"""
+        try:
+            # The response status does not matter, only the established connection
+            session.head(self.api_url, timeout=self.REQUEST_TIMEOUT[0])
+        except requests.exceptions.RequestException as e:
+            logger.debug("Claude API connection pre-warm failed: %s", e)
 
     def generate(
         self, pr_diff: str, pr_info: Dict[str, Any], custom_prompt: Optional[str] = None
@@ -271,76 +571,327 @@ Use the MOST SPECIFIC type from the allowed list above. Examples for common type
         Returns:
             Generated YAML changelog entry or None if generation failed
         """
-        try:
-            # Use custom prompt if provided, otherwise build from PR info
-            if custom_prompt:
-                user_message = custom_prompt
-                logger.debug("Using custom prompt for generation")
-            else:
-                # Extract PR information
-                pr_title = pr_info.get("title", "")
-                pr_body = pr_info.get("body", "")
-                pr_author = pr_info.get("user", {}).get("login", "unknown")
-                pr_author_url = pr_info.get("user", {}).get("html_url", "")
-                pr_labels = [
-                    label.get("name", "") for label in pr_info.get("labels", [])
-                ]
+        generated_entry, _ = self._generate_entry(pr_diff, pr_info, custom_prompt)
+        return generated_entry
 
-                # Extract commit authors if available
-                commit_authors = self._extract_commit_authors(pr_info)
-
-                # Build the user message
-                user_message = self._build_user_message(
-                    pr_title=pr_title,
-                    pr_body=pr_body,
-                    pr_author=pr_author,
-                    pr_author_url=pr_author_url,
-                    pr_labels=pr_labels,
-                    pr_diff=pr_diff,
-                    commit_authors=commit_authors,
-                )
+    def generate_batch(
+        self, items: List[Tuple[str, Dict[str, Any]]], max_workers: int = 4
+    ) -> List[Optional[str]]:
+        """
+        Generate changelog entries for several PRs concurrently
 
-            logger.debug(f"Sending request to Claude API (model: {self.model})")
+        Requests run in a bounded thread pool sharing this generator's session,
+        so wall time is close to the slowest request rather than the sum.
 
-            # Call Claude API with session
-            response = self.session.post(
-                self.api_url,
-                json={
-                    "model": self.model,
-                    "max_tokens": 1024,
-                    "system": self.system_prompt,
-                    "messages": [{"role": "user", "content": user_message}],
-                },
+        Args:
+            items: List of (pr_diff, pr_info) tuples
+            max_workers: Maximum number of concurrent Claude API requests
+
+        Returns:
+            Generated entries in the same order as items (None where generation failed)
+        """
+        if not items:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+            return list(executor.map(lambda item: self.generate(*item), items))
+
+    def generate_many(
+        self,
+        items: List[Tuple[str, Dict[str, Any]]],
+        poll_interval: float = 5.0,
+        max_wait: float = 3600.0,
+    ) -> Dict[str, Optional[str]]:
+        """
+        Generate changelog entries for many PRs through the Message Batches API
+
+        Batches are billed at a discount but may take minutes to complete, so
+        this suits backfills over many PRs rather than a single action run.
+
+        Args:
+            items: List of (pr_diff, pr_info) tuples
+            poll_interval: Initial delay in seconds between status checks,
+                doubled after each check up to one minute
+            max_wait: Maximum number of seconds to wait for the batch to end
+
+        Returns:
+            Mapping of custom_id ("pr-<number>", or "item-<index>" when the PR
+            number is unknown or repeated) to the generated entry, None where
+            generation failed
+        """
+        if not items:
+            return {}
+
+        params = {"model": self.model, "max_tokens": self.max_output_tokens}
+        if self._system_blocks:
+            params["system"] = self._system_blocks
+
+        requests_payload = []
+        seen_ids = set()
+        for index, (pr_diff, pr_info) in enumerate(items):
+            number = pr_info.get("number")
+            custom_id = f"pr-{number}"
+            # The API rejects a batch whose custom_ids aren't unique
+            if number is None or custom_id in seen_ids:
+                custom_id = f"item-{index}"
+            seen_ids.add(custom_id)
+            user_message = self._build_prompt(pr_diff, pr_info)
+            requests_payload.append(
+                {
+                    "custom_id": custom_id,
+                    "params": {
+                        **params,
+                        "messages": [{"role": "user", "content": user_message}],
+                    },
+                }
             )
+        entries: Dict[str, Optional[str]] = dict.fromkeys(
+            item["custom_id"] for item in requests_payload
+        )
 
+        try:
+            response = self.session.post(
+                self.batches_url,
+                json={"requests": requests_payload},
+                timeout=self.REQUEST_TIMEOUT,
+            )
             if response.status_code != 200:
                 logger.error(
-                    f"Claude API error: {response.status_code} - {response.text}"
+                    "Claude batch API error: %s - %s",
+                    response.status_code,
+                    response.text,
+                )
+                return entries
+            batch = self._wait_for_batch(response.json(), poll_interval, max_wait)
+            if batch is not None:
+                self._read_batch_results(batch["results_url"], entries)
+
+        except requests.exceptions.RequestException as e:
+            logger.error("Failed to call Claude batch API: %s", e)
+        except (KeyError, ValueError) as e:
+            logger.error("Failed to parse Claude batch response: %s", e)
+        return entries
+
+    def _wait_for_batch(
+        self, batch: Dict[str, Any], poll_interval: float, max_wait: float
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Poll a message batch with exponential backoff until it has ended
+
+        Args:
+            batch: Batch object returned when the batch was created
+            poll_interval: Initial delay in seconds between status checks
+            max_wait: Maximum number of seconds to wait
+
+        Returns:
+            The ended batch object, or None if it did not end within max_wait
+        """
+        deadline = time.monotonic() + max_wait
+        delay = poll_interval
+        while batch["processing_status"] != "ended":
+            if time.monotonic() >= deadline:
+                logger.error(
+                    "Claude batch %s did not finish within %ss", batch["id"], max_wait
                 )
                 return None
+            time.sleep(delay)
+            delay = min(delay * 2, 60.0)
+            response = self.session.get(
+                f"{self.batches_url}/{batch['id']}", timeout=self.REQUEST_TIMEOUT
+            )
+            response.raise_for_status()
+            batch = response.json()
+        return batch
+
+    def _read_batch_results(
+        self, results_url: str, entries: Dict[str, Optional[str]]
+    ) -> None:
+        """
+        Stream a batch's JSONL results and store each generated entry
+
+        Args:
+            results_url: URL of the batch results file
+            entries: Mapping of custom_id to entry, updated in place
+        """
+        response = self.session.get(
+            results_url, timeout=self.REQUEST_TIMEOUT, stream=True
+        )
+        try:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                item = json.loads(line)
+                result = item["result"]
+                if result["type"] != "succeeded":
+                    logger.warning(
+                        "Batch request %s %s", item["custom_id"], result["type"]
+                    )
+                    continue
+                entries[item["custom_id"]], _ = self._entry_from_message(
+                    result["message"]
+                )
+        finally:
+            response.close()
+
+    def _generate_entry(
+        self, pr_diff: str, pr_info: Dict[str, Any], custom_prompt: Optional[str] = None
+    ) -> Tuple[Optional[str], Any]:
+        """
+        Generate a changelog entry and return it together with its parsed form
+
+        Args:
+            pr_diff: The PR diff content
+            pr_info: PR information from GitHub event
+            custom_prompt: Optional custom user prompt (overrides default message building)
+
+        Returns:
+            Tuple of (generated_entry, parsed_entry), or (None, None) if generation failed
+        """
+        user_message = self._build_prompt(pr_diff, pr_info, custom_prompt)
+        try:
+            return self._request_entry([{"role": "user", "content": user_message}])
+        except GenerationError as e:
+            logger.error("%s", e)
+            return None, None
 
-            result = response.json()
-            generated_text = result["content"][0]["text"]
+    def _build_prompt(
+        self, pr_diff: str, pr_info: Dict[str, Any], custom_prompt: Optional[str] = None
+    ) -> Any:
+        """
+        Build the content of the first user message
+
+        Args:
+            pr_diff: The PR diff content
+            pr_info: PR information from GitHub event
+            custom_prompt: Optional custom user prompt (overrides default message building)
+
+        Returns:
+            The custom prompt string, or content blocks built from PR info
+        """
+        # Use custom prompt if provided, otherwise build from PR info
+        if custom_prompt:
+            logger.debug("Using custom prompt for generation")
+            return custom_prompt
+
+        # Extract PR information
+        pr_title = pr_info.get("title", "")
+        pr_body = pr_info.get("body", "")
+        pr_author = pr_info.get("user", {}).get("login", "unknown")
+        pr_author_url = pr_info.get("user", {}).get("html_url", "")
+        pr_labels = [label.get("name", "") for label in pr_info.get("labels", [])]
+
+        # Extract commit authors if available
+        commit_authors = self._extract_commit_authors(pr_info)
+
+        # Build the user message
+        return self._build_user_message(
+            pr_title=pr_title,
+            pr_body=pr_body,
+            pr_author=pr_author,
+            pr_author_url=pr_author_url,
+            pr_labels=pr_labels,
+            pr_diff=pr_diff,
+            commit_authors=commit_authors,
+        )
+
+    def _request_entry(
+        self, messages: List[Dict[str, Any]]
+    ) -> Tuple[Optional[str], Any]:
+        """
+        Send a conversation to Claude and parse the changelog entry it returns
+
+        Args:
+            messages: Messages API conversation ending with a user turn
 
-            # Extract YAML from markdown code blocks if present
-            generated_text = self._extract_yaml(generated_text)
+        Returns:
+            Tuple of (generated_entry, parsed_entry), or (None, None) if generation failed
+
+        Raises:
+            GenerationError: If the response was cut off at max_output_tokens
+        """
+        try:
+            logger.debug("Sending request to Claude API (model: %s)", self.model)
+
+            body = b"".join(
+                (
+                    self._payload_prefix,
+                    b',"messages":',
+                    json.dumps(messages, separators=(",", ":")).encode("utf-8"),
+                    b"}",
+                )
+            )
+
+            # Call Claude API with session
+            response = self.session.post(
+                self.api_url,
+                data=body,
+                timeout=self.REQUEST_TIMEOUT,
+                stream=self.stream_response,
+            )
 
-            # Validate that it's valid YAML
             try:
-                yaml.safe_load(generated_text)
-                logger.info("Successfully generated and validated changelog entry")
-                return generated_text.strip()
-            except yaml.YAMLError as e:
-                logger.error(f"Generated text is not valid YAML: {e}")
-                logger.debug(f"Generated text: {generated_text}")
-                return None
+                if response.status_code != 200:
+                    logger.error(
+                        "Claude API error: %s - %s", response.status_code, response.text
+                    )
+                    return None, None
+
+                if self.stream_response:
+                    result = self._read_stream(response)
+                else:
+                    result = response.json()
+            finally:
+                response.close()
+
+            if result.get("stop_reason") == "max_tokens":
+                # Resending at the same budget would be cut off again
+                raise GenerationError(
+                    f"Claude response hit the {self.max_output_tokens} token output limit"
+                )
+            return self._entry_from_message(result)
 
         except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to call Claude API: {e}")
-            return None
+            logger.error("Failed to call Claude API: %s", e)
+            return None, None
         except (KeyError, ValueError) as e:
-            logger.error(f"Failed to parse Claude response: {e}")
-            return None
+            logger.error("Failed to parse Claude response: %s", e)
+            return None, None
+
+    def _entry_from_message(self, result: Dict[str, Any]) -> Tuple[Optional[str], Any]:
+        """
+        Extract and parse the changelog entry from a Messages API response
+
+        Args:
+            result: Response message object
+
+        Returns:
+            Tuple of (generated_entry, parsed_entry), or (None, None) if the text
+            is not valid YAML
+
+        Raises:
+            KeyError: If the message has no text content
+        """
+        self._log_cache_usage(result.get("usage", {}))
+        if result.get("stop_reason") == "max_tokens":
+            logger.warning(
+                "Claude response hit the %d token output limit",
+                self.max_output_tokens,
+            )
+        generated_text = result["content"][0]["text"]
+
+        # Extract YAML from markdown code blocks if present
+        generated_text = self._extract_yaml(generated_text)
+
+        # Validate that it's valid YAML
+        try:
+            parsed_entry = _parse_entry(generated_text)
+            logger.info("Successfully generated and validated changelog entry")
+            return generated_text.strip(), parsed_entry
+        except yaml.YAMLError as e:
+            logger.error("Generated text is not valid YAML: %s", e)
+            logger.debug("Generated text: %s", generated_text)
+            return None, None
 
     def generate_with_validation(
         self,
@@ -364,44 +915,45 @@ Use the MOST SPECIFIC type from the allowed list above. Examples for common type
             - generated_entry: The YAML string or None
             - is_valid: Whether entry passed validation
             - message: Human-readable message about the result or validation errors
+
+        Raises:
+            GenerationError: If a response was cut off at max_output_tokens
         """
         max_retries = 2
         attempt = 0
         validation_errors = []
 
+        first_message = {
+            "role": "user",
+            "content": self._build_prompt(pr_diff, pr_info, custom_prompt),
+        }
+        messages = [first_message]
+
         while attempt <= max_retries:
             attempt += 1
             logger.info(
-                f"Generating changelog entry (attempt {attempt}/{max_retries + 1})"
+                "Generating changelog entry (attempt %d/%d)", attempt, max_retries + 1
             )
 
-            # Generate entry
-            if attempt == 1:
-                # First attempt: use provided prompt
-                generated_entry = self.generate(pr_diff, pr_info, custom_prompt)
-            else:
-                # Retry attempts: use enhanced prompt with validation context
-                retry_prompt = self._build_retry_prompt(
-                    custom_prompt, validation_errors, pr_diff, pr_info
-                )
-                generated_entry = self.generate(pr_diff, pr_info, retry_prompt)
+            # Retries resend the same first message, so its cached prefix is reused
+            generated_entry, parsed_entry = self._request_entry(messages)
 
             if not generated_entry:
-                logger.error(f"Generation failed on attempt {attempt}")
+                logger.error("Generation failed on attempt %d", attempt)
                 if attempt <= max_retries:
-                    logger.info(f"Retrying... (attempt {attempt + 1})")
+                    logger.info("Retrying... (attempt %d)", attempt + 1)
                     continue
                 else:
                     return None, False, "Failed to generate valid YAML after retries"
 
             # Log the generated entry for debugging
-            logger.debug(f"Generated entry (attempt {attempt}):\n{generated_entry}")
+            logger.debug("Generated entry (attempt %d):\n%s", attempt, generated_entry)
 
-            # Validate the generated entry
-            is_valid, validation_errors = validator.validate(generated_entry)
+            # Validate the already-parsed entry (avoids parsing the YAML twice)
+            is_valid, validation_errors = validator.validate_entry(parsed_entry)
 
             if is_valid:
-                logger.info(f"Entry passed validation on attempt {attempt}")
+                logger.info("Entry passed validation on attempt %d", attempt)
                 return (
                     generated_entry,
                     True,
@@ -410,90 +962,125 @@ Use the MOST SPECIFIC type from the allowed list above. Examples for common type
 
             # Entry invalid - log errors and retry if attempts remain
             error_message = "; ".join(validation_errors)
-            logger.warning(f"Validation failed on attempt {attempt}: {error_message}")
             logger.warning(
-                f"Generated YAML that failed validation (attempt {attempt}):\n{generated_entry}"
+                "Validation failed on attempt %d: %s", attempt, error_message
+            )
+            logger.warning(
+                "Generated YAML that failed validation (attempt %d):\n%s",
+                attempt,
+                generated_entry,
             )
 
             if attempt <= max_retries:
                 logger.info(
-                    f"Retrying with validation feedback... (attempt {attempt + 1})"
-                )
-                logger.info(
-                    f"Validation feedback for retry: {'; '.join(validation_errors)}"
+                    "Retrying with validation feedback... (attempt %d)", attempt + 1
                 )
+                logger.info("Validation feedback for retry: %s", error_message)
+                # Continue the conversation: show Claude its answer and the errors
+                messages = [
+                    first_message,
+                    {"role": "assistant", "content": generated_entry},
+                    {
+                        "role": "user",
+                        "content": self._build_retry_prompt(validation_errors),
+                    },
+                ]
                 continue
             else:
                 # All retries exhausted
                 logger.error(
-                    f"Entry failed validation after {max_retries + 1} attempts"
+                    "Entry failed validation after %d attempts", max_retries + 1
                 )
                 return None, False, f"Entry failed validation: {error_message}"
 
         # Should not reach here, but just in case
         return None, False, "Unexpected error in generate_with_validation"
 
-    def _build_retry_prompt(
-        self,
-        original_prompt: Optional[str],
-        validation_errors: list,
-        pr_diff: str,
-        pr_info: Dict[str, Any],
-    ) -> str:
+    def _build_retry_prompt(self, validation_errors: list) -> str:
         """
-        Build a retry prompt that includes validation feedback.
+        Build the follow-up message asking Claude to correct its previous entry.
+
+        The PR details and diff are already in the conversation, so only the
+        validation feedback is sent.
 
         Args:
-            original_prompt: The original custom prompt if provided
             validation_errors: List of validation error messages
-            pr_diff: The PR diff
-            pr_info: PR information
 
         Returns:
-            Enhanced prompt with validation context
+            Correction request with validation context
         """
         errors_text = "\n".join(f"  - {error}" for error in validation_errors)
 
-        retry_context = f"""Your previous generated changelog entry had validation errors. Please fix these issues:
+        retry_prompt = f"""Your previous generated changelog entry had validation errors. Please fix these issues:
 
 {errors_text}
 
-Try again, ensuring your output addresses each validation error above."""
-
-        if original_prompt:
-            # If there was a custom prompt, append retry context to it
-            retry_prompt = f"{original_prompt}\n\n{retry_context}"
-        else:
-            # Otherwise, build a complete prompt with the diff and retry context
-            pr_title = pr_info.get("title", "")
-            pr_body = pr_info.get("body", "")
-            pr_author = pr_info.get("user", {}).get("login", "unknown")
-
-            retry_prompt = f"""Generate a logchange-formatted YAML changelog entry for this PR.
+Try again, ensuring your output addresses each validation error above.
+Output ONLY the corrected YAML with no additional text."""
 
-PR Title: {pr_title}
+        logger.debug("Retry prompt:\n%s", retry_prompt)
+        return retry_prompt
 
-PR Description:
-{pr_body}
+    @staticmethod
+    def _read_stream(response: requests.Response) -> Dict[str, Any]:
+        """
+        Assemble a Messages API result from a server-sent event stream
 
-Author: {pr_author}
+        Args:
+            response: Streaming response from the Claude API
 
-Changes:
-```diff
-{pr_diff}
-```
+        Returns:
+            Result in the same shape as a non-streaming response body
 
-{retry_context}
+        Raises:
+            ValueError: If the stream reports an error, contains malformed events
+                or ends before message_stop
+        """
+        text_parts = []
+        result = {"usage": {}, "stop_reason": None}
 
-Output ONLY the corrected YAML with no additional text."""
+        response.encoding = "utf-8"
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
 
-        logger.debug(f"Retry prompt:\n{retry_prompt}")
-        return retry_prompt
+            event = json.loads(line[5:])
+            event_type = event.get("type")
+            if event_type == "content_block_delta":
+                text_parts.append(event["delta"].get("text", ""))
+            elif event_type == "message_start":
+                result["usage"].update(event["message"].get("usage", {}))
+            elif event_type == "message_delta":
+                result["stop_reason"] = event["delta"].get("stop_reason")
+                result["usage"].update(event.get("usage", {}))
+            elif event_type == "message_stop":
+                break
+            elif event_type == "error":
+                raise ValueError(event["error"].get("message", "stream error"))
+        else:
+            # A dropped connection must not pass off the partial text as complete
+            raise ValueError("stream ended before message_stop")
+
+        result["content"] = [{"type": "text", "text": "".join(text_parts)}]
+        return result
+
+    def _log_cache_usage(self, usage: Dict[str, Any]) -> None:
+        """Log prompt cache statistics reported by the Claude API"""
+        if not usage:
+            return
+
+        logger.info(
+            "Claude usage: input=%s, cache_read=%s, cache_write=%s, output=%s",
+            usage.get("input_tokens", 0),
+            usage.get("cache_read_input_tokens", 0),
+            usage.get("cache_creation_input_tokens", 0),
+            usage.get("output_tokens", 0),
+        )
 
     def _extract_yaml(self, text: str) -> str:
         """Extract YAML from markdown code blocks if present"""
         # Try to extract from ```yaml ... ``` or ``` ... ``` block
-        match = re.search(r"```(?:yaml)?\s*\n(.*?)\n```", text, re.DOTALL)
+        match = _YAML_FENCE_RE.search(text)
         if match:
             return match.group(1).strip()
 
@@ -502,21 +1089,21 @@ Output ONLY the corrected YAML with no additional text."""
 
     def _extract_commit_authors(self, pr_info: Dict[str, Any]) -> list:
         """Extract unique authors from commits if available"""
-        authors = set()
-        commits = (
-            pr_info.get("commits", [])
-            if isinstance(pr_info.get("commits"), list)
-            else []
-        )
+        commits = pr_info.get("commits")
+        if not isinstance(commits, list):
+            return []
 
+        authors = {}
         for commit in commits:
-            author_info = commit.get("author", {})
-            if author_info and isinstance(author_info, dict):
+            author_info = commit.get("author")
+            if isinstance(author_info, dict):
                 login = author_info.get("login")
                 if login:
-                    authors.add(login)
+                    authors[login] = None
 
-        return sorted(list(authors))
+        # Sorted rather than insertion order: a deterministic prompt for the same
+        # PR keeps retries and re-runs byte-identical, which helps prompt caching
+        return sorted(authors)
 
     def _build_user_message(
         self,
@@ -527,66 +1114,113 @@ Output ONLY the corrected YAML with no additional text."""
         pr_labels: list,
         pr_diff: str,
         commit_authors: list = None,
-    ) -> str:
-        """Build the user message for Claude"""
+    ) -> List[Dict[str, Any]]:
+        """
+        Build the user message for Claude
+
+        Returns:
+            Content blocks: the cached configuration prefix, the PR details,
+            the diff and the closing instructions
+        """
         if commit_authors is None:
             commit_authors = []
 
-        # Build validation rules section
-        rules_section = self._build_validation_rules()
-
         # Build authors section
         authors_section = self._build_authors_section(
             pr_author, commit_authors, pr_author_url
         )
 
-        # Build language instruction
-        language_section = (
-            f"Write the changelog entry in {self.changelog_language}."
-            if self.changelog_language != "English"
-            else ""
+        pr_section = _USER_MESSAGE_TEMPLATE.format_map(
+            {
+                "pr_title": pr_title,
+                "pr_body": pr_body if pr_body else "(No description provided)",
+                "pr_author": pr_author,
+                "author_url_line": (
+                    f"**Author URL:** {pr_author_url}" if pr_author_url else ""
+                ),
+                "authors_section": authors_section,
+                "labels": ", ".join(pr_labels) if pr_labels else "None",
+            }
         )
+        footer = _USER_MESSAGE_FOOTER_TEMPLATE.format_map({"pr_author": pr_author})
+
+        return [
+            self._static_user_block,
+            {"type": "text", "text": pr_section},
+            # The API rejects empty text blocks
+            {"type": "text", "text": self._truncate_diff(pr_diff) or _NO_DIFF_TEXT},
+            {"type": "text", "text": footer},
+        ]
 
-        # Build types list
-        types_list = ", ".join(self.changelog_types)
-
-        message = f"""Generate a logchange changelog entry for the following pull request:
-
-**PR Title:** {pr_title}
-
-**PR Description:**
-{pr_body if pr_body else '(No description provided)'}
-
-**Primary Author:** {pr_author}
-{f'**Author URL:** {pr_author_url}' if pr_author_url else ''}
-
-{authors_section}
-
-**Labels:** {', '.join(pr_labels) if pr_labels else 'None'}
-
-**Allowed entry types:**
-{types_list}
+    def _truncate_diff(self, diff: str) -> str:
+        """
+        Trim the diff to the configured token budgets
 
-**Language:**
-{language_section if language_section else 'English (default)'}
+        Lock files, minified assets, binary files and files matching
+        skip_files_regex are reduced to their header. Files over
+        max_tokens_per_file lose their unchanged context lines first and are
+        then cut; the whole diff is capped at max_tokens_context (approximated
+        as CHARS_PER_TOKEN characters per token).
 
-**Validation Rules:**
-{rules_section}
+        Args:
+            diff: The PR diff, optionally preceded by a file list
 
-**Changes:**
-```diff
-{pr_diff}
-```
+        Returns:
+            The diff within budget, with markers where content was dropped
+        """
+        budget = self.max_tokens_context * CHARS_PER_TOKEN
+        starts = [match.start() for match in _DIFF_FILE_RE.finditer(diff)]
+        if not starts:
+            return self._cut_text(diff, budget)
+
+        per_file = self.max_tokens_per_file * CHARS_PER_TOKEN
+        ends = starts[1:] + [len(diff)]
+        # Keep anything before the first file header (e.g. the list of edited files)
+        parts = [diff[: starts[0]]]
+        budget -= len(parts[0])
+
+        for index, (start, end) in enumerate(zip(starts, ends)):
+            section = diff[start:end]
+            header, _, _ = section.partition("\n")
+            if header.endswith(_SKIPPED_DIFF_SUFFIXES) or "\nBinary files " in section:
+                section = f"{header}\n... [generated or binary file omitted] ...\n"
+            elif self._skip_files_re and self._skip_files_re.match(
+                header.rpartition(" b/")[2]
+            ):
+                section = f"{header}\n... [skipped file omitted] ...\n"
+            elif len(section) > per_file:
+                section = self._cut_text(self._drop_context_lines(section), per_file)
+
+            if len(section) > budget:
+                parts.append(self._cut_text(section, max(budget, 0)))
+                omitted = len(starts) - index - 1
+                if omitted:
+                    parts.append(f"... [{omitted} more file(s) omitted] ...\n")
+                break
+
+            parts.append(section)
+            budget -= len(section)
+
+        return "".join(parts)
 
-**IMPORTANT INSTRUCTIONS:**
-1. Always include the "authors" field with at least the primary author ({pr_author})
-2. The authors section must contain the PR author information
-3. Extract any additional authors from commit authors if available
-4. Generate a valid logchange YAML entry that accurately describes this change
-5. Make sure the generated YAML is valid and can be parsed directly
-6. Output ONLY the YAML with no additional text"""
+    @staticmethod
+    def _drop_context_lines(section: str) -> str:
+        """Remove unchanged context lines from a file diff, keeping headers and changes"""
+        lines = section.splitlines(keepends=True)
+        kept = [line for line in lines if not line.startswith(" ")]
+        if len(kept) == len(lines):
+            return section
+        return "".join(kept)
 
-        return message
+    @staticmethod
+    def _cut_text(text: str, limit: int) -> str:
+        """Cut text at the last line break within limit, noting how many lines were dropped"""
+        if len(text) <= limit:
+            return text
+
+        cut = text.rfind("\n", 0, limit) + 1
+        dropped = text.count("\n", cut) + (0 if text.endswith("\n") else 1)
+        return f"{text[:cut]}... [truncated {dropped} lines] ...\n"
 
     def _build_validation_rules(self) -> str:
         """Build validation rules section for the prompt"""
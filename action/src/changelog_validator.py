@@ -1,10 +1,19 @@
 """Changelog validation module"""
 
+import hashlib
 import logging
+from collections import OrderedDict
 from typing import Any, Dict, List, Tuple
 
 import yaml
 
+try:
+    from yaml import CSafeDumper as _SafeDumper
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeDumper as _SafeDumper
+    from yaml import SafeLoader as _SafeLoader
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,12 +45,16 @@ class ChangelogValidator:
         "other",
     }
 
+    # Number of validate() results remembered per validator
+    VALIDATION_CACHE_SIZE = 128
+
     def __init__(
         self,
         changelog_types: List[str] = None,
         mandatory_fields: List[str] = None,
         forbidden_fields: List[str] = None,
         optional_fields: List[str] = None,
+        fast_fail: bool = False,
     ):
         """
         Initialize validator with custom rules
@@ -51,6 +64,7 @@ class ChangelogValidator:
             mandatory_fields: Fields that must be present
             forbidden_fields: Fields that must not be present
             optional_fields: Allowed fields (if empty, all standard fields allowed)
+            fast_fail: Skip the field-level checks when a mandatory field is missing
         """
         self.changelog_types = changelog_types or list(self.STANDARD_TYPES)
         self.mandatory_fields = mandatory_fields or ["title"]
@@ -58,6 +72,23 @@ class ChangelogValidator:
         self.optional_fields = (
             optional_fields or []
         )  # Empty means all standard fields allowed
+        self.fast_fail = fast_fail
+
+        # Precompute rule data used on every validation. The rules are fixed
+        # once the validator is built; create a new validator to change them.
+        self._types_set = frozenset(self.changelog_types)
+        self._types_message = ", ".join(self.changelog_types)
+        if self.optional_fields:
+            # Custom list restricts what's allowed
+            self._allowed_fields = frozenset(self.optional_fields) | frozenset(
+                self.mandatory_fields
+            )
+        else:
+            # Default: allow all standard fields (unknown fields are not reported)
+            self._allowed_fields = None
+
+        # validate() results keyed by content hash and fast_fail
+        self._cache: "OrderedDict[Tuple, Tuple[bool, List[str]]]" = OrderedDict()
 
     def validate(self, yaml_content: str) -> Tuple[bool, List[str]]:
         """
@@ -66,23 +97,55 @@ class ChangelogValidator:
         Returns:
             Tuple of (is_valid, error_messages)
         """
-        errors = []
+        key = (
+            hashlib.blake2b(yaml_content.encode(), digest_size=16).digest(),
+            self.fast_fail,
+        )
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached[0], list(cached[1])
 
         # Try to parse YAML
         try:
-            entry = yaml.safe_load(yaml_content)
-            if not entry:
-                return False, ["YAML is empty"]
+            entry = yaml.load(yaml_content, Loader=_SafeLoader)
+        except yaml.YAMLError as e:
+            result = (False, [f"Invalid YAML: {str(e)}"])
+        else:
+            result = self.validate_entry(entry)
 
-            if not isinstance(entry, dict):
-                return False, ["YAML must be a dictionary/object"]
+        self._cache[key] = (result[0], list(result[1]))
+        if len(self._cache) > self.VALIDATION_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return result
 
-        except yaml.YAMLError as e:
-            return False, [f"Invalid YAML: {str(e)}"]
+    def validate_entry(self, entry: Any) -> Tuple[bool, List[str]]:
+        """
+        Validate an already-parsed changelog entry
+
+        Args:
+            entry: Parsed YAML content
+
+        Returns:
+            Tuple of (is_valid, error_messages)
+        """
+        errors = []
+
+        if not entry:
+            return False, ["YAML is empty"]
+
+        if not isinstance(entry, dict):
+            return False, ["YAML must be a dictionary/object"]
 
         # Validate structure
         errors.extend(self._validate_structure(entry))
 
+        # A missing mandatory field already fails the entry
+        if self.fast_fail and any(
+            entry.get(field) is None for field in self.mandatory_fields
+        ):
+            return False, errors
+
         # Validate types if present
         if "type" in entry:
             errors.extend(self._validate_type(entry["type"]))
@@ -111,19 +174,12 @@ class ChangelogValidator:
             if field in entry and entry[field] is not None:
                 errors.append(f"Forbidden field present: {field}")
 
-        # Determine allowed fields
-        if self.optional_fields:
-            # Custom list restricts what's allowed
-            allowed_fields = set(self.optional_fields) | set(self.mandatory_fields)
-        else:
-            # Default: allow all standard fields
-            allowed_fields = self.STANDARD_FIELDS | set(self.mandatory_fields)
-
         # Check for unknown fields (only enforce with custom list)
-        if self.optional_fields:
-            for field in entry.keys():
-                if field not in allowed_fields:
-                    errors.append(f"Unknown field: {field}")
+        if self._allowed_fields is not None:
+            unknown = entry.keys() - self._allowed_fields
+            if unknown:
+                # Report in entry order for stable messages
+                errors.extend(f"Unknown field: {f}" for f in entry if f in unknown)
 
         # Validate specific field types
         if "title" in entry and not isinstance(entry["title"], str):
@@ -139,9 +195,9 @@ class ChangelogValidator:
             errors.append("type must be a string")
             return errors
 
-        if change_type not in self.changelog_types:
+        if change_type not in self._types_set:
             errors.append(
-                f'Invalid type "{change_type}". Allowed types: {", ".join(self.changelog_types)}'
+                f'Invalid type "{change_type}". Allowed types: {self._types_message}'
             )
 
         return errors
@@ -212,4 +268,6 @@ class ChangelogValidator:
             ],
         }
 
-        return yaml.dump(template, default_flow_style=False, sort_keys=False)
+        return yaml.dump(
+            template, Dumper=_SafeDumper, default_flow_style=False, sort_keys=False
+        )
@@ -2,10 +2,11 @@
 Configuration loading and parsing for Logchange Action
 """
 
+import functools
 import json
 import logging
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 from exceptions import ConfigurationError
 
@@ -35,7 +36,7 @@ class ActionConfig:
         # Claude configuration
         self.claude_token = self._get_input("claude-token", "")
         logger.debug(
-            f"Claude token: {'***' if self.claude_token else '(not provided)'}"
+            "Claude token: %s", "***" if self.claude_token else "(not provided)"
         )
         self.claude_model = self._get_input("claude-model", "claude-opus-4-1-20250805")
         self.claude_system_prompt = self._get_input("claude-system-prompt", "")
@@ -114,16 +115,35 @@ class ActionConfig:
         Returns:
             Input value from environment or default
         """
-        underscored = "INPUT_" + input_name.upper().replace("-", "_")
-        hyphenated = "INPUT_" + input_name.upper()
+        underscored, hyphenated = ActionConfig._input_env_names(input_name)
 
         value = os.getenv(underscored) or os.getenv(hyphenated) or default
-        logger.debug(
-            f"_get_input({input_name}): underscore={underscored}={os.getenv(underscored)}, "
-            f"hyphen={hyphenated}={os.getenv(hyphenated)}, result={value}"
-        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "_get_input(%s): underscore=%s=%s, hyphen=%s=%s, result=%s",
+                input_name,
+                underscored,
+                os.getenv(underscored),
+                hyphenated,
+                os.getenv(hyphenated),
+                value,
+            )
         return value
 
+    @staticmethod
+    @functools.lru_cache(maxsize=128)
+    def _input_env_names(input_name: str) -> Tuple[str, str]:
+        """Build the underscored and hyphenated env var names for an input.
+
+        Args:
+            input_name: Input name (with hyphens)
+
+        Returns:
+            Tuple of (underscored, hyphenated) environment variable names
+        """
+        upper = input_name.upper()
+        return "INPUT_" + upper.replace("-", "_"), "INPUT_" + upper
+
     @staticmethod
     def _parse_list_input(input_name: str, default: str) -> List[str]:
         """Parse comma-separated input into a list.
@@ -153,10 +173,12 @@ class ActionConfig:
             return {}
 
         try:
-            with open(event_path, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
-            logger.error(f"Failed to load GitHub event: {e}")
+            # json.loads detects the encoding of raw bytes itself, which skips
+            # the text-mode decoding layer for large events
+            with open(event_path, "rb") as f:
+                return json.loads(f.read())
+        except (json.JSONDecodeError, UnicodeDecodeError, IOError) as e:
+            logger.error("Failed to load GitHub event: %s", e)
             return {}
 
     def _validate_config(self) -> None:
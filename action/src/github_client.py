@@ -2,16 +2,122 @@
 
 import logging
 import os
-from typing import Any, Dict, List
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
+# First line of each file section in a unified git diff
+_DIFF_HEADER = "diff --git"
+_DIFF_HEADER_LINE = "\n" + _DIFF_HEADER
+
+# Start of the line added where a diff was truncated
+_TRUNCATION_PREFIX = "... "
+
+# One GraphQL query for the PR data otherwise needed from several paginated
+# REST endpoints
+_PR_OVERVIEW_QUERY = """
+query($owner: String!, $name: String!, $number: Int!) {
+  repository(owner: $owner, name: $name) {
+    pullRequest(number: $number) {
+      files(first: 100) {
+        pageInfo { hasNextPage }
+        nodes { path }
+      }
+      comments(first: 100) {
+        pageInfo { hasNextPage }
+        nodes { databaseId body }
+      }
+    }
+  }
+}
+"""
+
+# Hidden marker prepended to suggestion comments posted by this action
+SUGGESTION_MARKER = "<!-- logchange-action:suggestion:v1 -->"
+
+# Phrases that identify comments posted by this action, matched in one scan.
+# Kept as a fallback for comments posted before SUGGESTION_MARKER existed.
+_SUGGESTION_MARKERS_RE = re.compile(
+    "|".join(
+        re.escape(marker)
+        for marker in (
+            "I've generated a changelog entry",
+            "I've converted the legacy changelog entry",
+            "Found changes to",
+            "changelog entry does not comply",
+            "No changelog entry found",
+            "Legacy changelog entry found",
+        )
+    )
+)
+
+
+class _RateLimitRetry(Retry):
+    """Retry policy that also resends requests GitHub rejected for rate limiting"""
+
+    # Longest wait honored from a single Retry-After header, in seconds
+    MAX_RETRY_AFTER = 30.0
+
+    def is_retry(
+        self, method: str, status_code: int, has_retry_after: bool = False
+    ) -> bool:
+        # Secondary rate limits answer 403/429 with Retry-After; such requests
+        # were never processed, so resending is safe even for POST
+        if has_retry_after and status_code in (403, 429):
+            return bool(self.total)
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def get_retry_after(self, response: Any) -> Optional[float]:
+        # A secondary rate limit can ask for a wait longer than the job has left
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.MAX_RETRY_AFTER)
+
 
 class GitHubClient:
     """Client for GitHub API operations"""
 
+    # Items requested per page from paginated list endpoints
+    PER_PAGE = 100
+
+    # Maximum number of pages fetched concurrently after the first one
+    MAX_PAGE_WORKERS = 10
+
+    # Seconds a fetched PR file list or diff is reused before refetching
+    CACHE_TTL = 120.0
+
+    # The diff download stops after this many times the character budget;
+    # per-file limits let truncation skip ahead, so some slack is kept
+    DIFF_DOWNLOAD_FACTOR = 20
+
+    # (connect, read) timeout in seconds for GitHub API requests
+    REQUEST_TIMEOUT = (10, 30)
+
+    # Transient server errors are retried for reads only, so a comment POST
+    # that may have been processed is never posted twice
+    RETRY = _RateLimitRetry(
+        total=5,
+        backoff_factor=1.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["HEAD", "GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+    # Below this many remaining requests, wait for the rate limit window to
+    # reset if that happens within MAX_RATE_LIMIT_WAIT seconds
+    RATE_LIMIT_LOW_WATER = 5
+    MAX_RATE_LIMIT_WAIT = 60.0
+
     def __init__(self, token: str, api_url: str, event: Dict[str, Any]):
         """Initialize GitHub client"""
         self.token = token
@@ -25,6 +131,15 @@ class GitHubClient:
                 "X-GitHub-Api-Version": "2022-11-28",
             }
         )
+        # One keep-alive pool per host, sized for concurrent page fetches, so
+        # every request after the first reuses an established TLS connection
+        adapter = HTTPAdapter(
+            max_retries=self.RETRY,
+            pool_connections=self.MAX_PAGE_WORKERS,
+            pool_maxsize=self.MAX_PAGE_WORKERS,
+        )
+        self.session.mount("https://", adapter)
+        self.session.hooks["response"].append(self._check_rate_limit)
 
         # Extract PR info
         self.repo_owner = os.getenv("GITHUB_REPOSITORY_OWNER", "")
@@ -34,6 +149,70 @@ class GitHubClient:
             else ""
         )
         self.pr_number = event.get("pull_request", {}).get("number", 0)
+        self.head_sha = event.get("pull_request", {}).get("head", {}).get("sha", "")
+
+        # Endpoint URLs only depend on the event, so build them once
+        repo_url = f"{self.api_url}/repos/{self.repo_owner}/{self.repo_name}"
+        self._pr_url = f"{repo_url}/pulls/{self.pr_number}"
+        self._pr_files_url = f"{self._pr_url}/files"
+        self._pr_review_comments_url = f"{self._pr_url}/comments"
+        self._issue_comments_url = f"{repo_url}/issues/{self.pr_number}/comments"
+
+        # Successful fetches keyed by (kind, owner, repo, PR, head SHA, ...)
+        self._cache: Dict[tuple, Tuple[float, Any]] = {}
+
+        # GitHub Enterprise serves GraphQL at /api/graphql next to /api/v3
+        if self.api_url.endswith("/api/v3"):
+            self.graphql_url = self.api_url[: -len("/v3")] + "/graphql"
+        else:
+            self.graphql_url = f"{self.api_url}/graphql"
+        self._graphql_available = True
+
+        # (ETag, body, links) of GET responses, keyed by (url, params), so
+        # unchanged resources come back as 304s that don't count against the
+        # rate limit
+        self._etag_cache: Dict[tuple, Tuple[str, Any, Dict[str, Any]]] = {}
+
+    def _check_rate_limit(self, response: requests.Response, *args, **kwargs) -> None:
+        """Slow down when the primary rate limit is nearly used up"""
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is None or int(remaining) >= self.RATE_LIMIT_LOW_WATER:
+            return
+
+        wait = float(response.headers.get("X-RateLimit-Reset", 0)) - time.time()
+        if 0 < wait <= self.MAX_RATE_LIMIT_WAIT:
+            logger.warning(
+                "GitHub rate limit nearly exhausted (%s left), waiting %.0fs for reset",
+                remaining,
+                wait,
+            )
+            time.sleep(wait)
+        else:
+            logger.warning("GitHub rate limit nearly exhausted (%s left)", remaining)
+
+    def _cache_key(self, kind: str, *args: Any) -> tuple:
+        """Build a cache key for this PR at its current head commit"""
+        return (
+            kind,
+            self.repo_owner,
+            self.repo_name,
+            self.pr_number,
+            self.head_sha,
+        ) + args
+
+    def _cache_get(self, key: tuple) -> Optional[Any]:
+        """Return a cached value if present and younger than CACHE_TTL"""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] >= self.CACHE_TTL:
+            del self._cache[key]
+            return None
+        return entry[1]
+
+    def _cache_put(self, key: tuple, value: Any) -> None:
+        """Store a successfully fetched value"""
+        self._cache[key] = (time.monotonic(), value)
 
     def get_pr_files(self) -> List[str]:
         """Get list of files modified in the PR"""
@@ -41,31 +220,179 @@ class GitHubClient:
             logger.warning("No PR number found")
             return []
 
-        url = f"{self.api_url}/repos/{self.repo_owner}/{self.repo_name}/pulls/{self.pr_number}/files"
-        files = []
-        page = 1
+        cache_key = self._cache_key("files")
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return list(cached)
 
-        try:
-            while True:
-                response = self.session.get(url, params={"page": page, "per_page": 100})
-                response.raise_for_status()
+        overview = self._get_pr_overview()
+        if overview and not overview["files"]["pageInfo"]["hasNextPage"]:
+            files = [node["path"] for node in overview["files"]["nodes"]]
+            logger.info(f"Retrieved {len(files)} files from PR")
+            self._cache_put(cache_key, tuple(files))
+            return files
 
-                batch = response.json()
-                if not batch:
-                    break
+        url = self._pr_files_url
+        files = []
 
+        try:
+            # File records carry the whole patch; only the name is needed
+            for batch in self._paginate(url, fields=("filename",)):
                 for file in batch:
                     files.append(file["filename"])
 
-                page += 1
-
             logger.info(f"Retrieved {len(files)} files from PR")
+            self._cache_put(cache_key, tuple(files))
             return files
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to get PR files: {e}")
             return []
 
+    def _get_pr_overview(self) -> Optional[Dict[str, Any]]:
+        """
+        Fetch the PR's files and comments with a single GraphQL query
+
+        The result is cached like other fetches. Once a query fails, GraphQL is
+        not tried again and callers use the REST endpoints.
+
+        Returns:
+            The pullRequest object from the query, or None if unavailable
+        """
+        if not self._graphql_available:
+            return None
+
+        cache_key = self._cache_key("overview")
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            response = self.session.post(
+                self.graphql_url,
+                json={
+                    "query": _PR_OVERVIEW_QUERY,
+                    "variables": {
+                        "owner": self.repo_owner,
+                        "name": self.repo_name,
+                        "number": self.pr_number,
+                    },
+                },
+                timeout=self.REQUEST_TIMEOUT,
+            )
+            response.raise_for_status()
+            result = response.json()
+            if result.get("errors"):
+                raise ValueError(result["errors"][0].get("message", "GraphQL error"))
+            overview = result["data"]["repository"]["pullRequest"]
+            if overview is None:
+                raise ValueError("pull request not found")
+        except (
+            requests.exceptions.RequestException,
+            KeyError,
+            TypeError,
+            ValueError,
+        ) as e:
+            logger.info("GraphQL PR query unavailable, using REST API: %s", e)
+            self._graphql_available = False
+            return None
+
+        self._cache_put(cache_key, overview)
+        return overview
+
+    def _conditional_get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        as_text: bool = False,
+        fields: Optional[Tuple[str, ...]] = None,
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """
+        GET a resource, revalidating a previously seen response by its ETag
+
+        Args:
+            url: URL to fetch
+            params: Optional query parameters
+            as_text: Return the body as text instead of parsed JSON
+            fields: For list responses, keep only these keys of each item so
+                large values (e.g. file patches) are not held in the ETag cache
+
+        Returns:
+            Tuple of (body, parsed Link header)
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails
+        """
+        key = (url, tuple(sorted(params.items())) if params else ())
+        cached = self._etag_cache.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else None
+
+        response = self.session.get(
+            url, params=params, headers=headers, timeout=self.REQUEST_TIMEOUT
+        )
+        if cached and response.status_code == 304:
+            return cached[1], cached[2]
+        response.raise_for_status()
+
+        body = response.text if as_text else response.json()
+        if fields:
+            body = [{field: item.get(field) for field in fields} for item in body]
+        etag = response.headers.get("ETag")
+        if etag:
+            self._etag_cache[key] = (etag, body, response.links)
+        return body, response.links
+
+    def _paginate(
+        self, url: str, fields: Optional[Tuple[str, ...]] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield every page of a paginated GitHub list endpoint, in order
+
+        The first page is fetched alone to learn the last page number from its
+        Link header; the remaining pages are then fetched concurrently. Pages
+        are only requested once the caller moves past the first one, and
+        pending requests are cancelled if it stops iterating.
+
+        Args:
+            url: API URL of the list endpoint
+            fields: Keys to keep from each item, or None to keep all of them
+
+        Yields:
+            The JSON items of each page
+
+        Raises:
+            requests.exceptions.RequestException: If any page request fails
+        """
+
+        def fetch(page: int) -> List[Dict[str, Any]]:
+            items, _ = self._conditional_get(
+                url, params={"page": page, "per_page": self.PER_PAGE}, fields=fields
+            )
+            return items
+
+        items, links = self._conditional_get(
+            url, params={"page": 1, "per_page": self.PER_PAGE}, fields=fields
+        )
+        yield items
+
+        last = links.get("last", {}).get("url")
+        if not last:
+            return
+        last_page = int(parse_qs(urlparse(last).query).get("page", ["1"])[0])
+        if last_page < 2:
+            return
+
+        pages = range(2, last_page + 1)
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.MAX_PAGE_WORKERS, len(pages))
+        )
+        try:
+            yield from executor.map(fetch, pages)
+        finally:
+            # A caller that stops early (e.g. on a match) doesn't wait for
+            # pages it will never read
+            executor.shutdown(wait=False, cancel_futures=True)
+
     def get_pr_diff(
         self,
         pr_files: List[str],
@@ -77,37 +404,80 @@ class GitHubClient:
             logger.warning("No PR number found")
             return ""
 
-        url = f"{self.api_url}/repos/{self.repo_owner}/{self.repo_name}/pulls/{self.pr_number}"
-
-        try:
-            response = self.session.get(url)
-            response.raise_for_status()
-
-            pr_data = response.json()
-            diff_url = pr_data.get("diff_url", "")
+        cache_key = self._cache_key(
+            "diff", tuple(pr_files), max_total_tokens, max_per_file
+        )
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
 
-            if not diff_url:
-                logger.warning("No diff URL found")
-                return ""
+        url = self._pr_url
 
-            # Fetch the diff using session (for consistency and auth)
-            diff_response = self.session.get(diff_url)
-            diff_response.raise_for_status()
-            diff_content = diff_response.text
+        try:
+            # The diff media type makes the PR endpoint return the diff itself
+            diff_content = self._download_diff(
+                url, max_total_tokens * self.DIFF_DOWNLOAD_FACTOR
+            )
 
-            # Truncate if necessary
-            if len(diff_content) > max_total_tokens:
+            # The file list leads the diff whether or not it needs truncating,
+            # and counts towards the limit either way
+            file_list_section = self._build_file_list_section(pr_files)
+            if len(file_list_section) + len(diff_content) > max_total_tokens:
                 diff_content = self._truncate_diff(
                     diff_content, pr_files, max_total_tokens, max_per_file
                 )
+            else:
+                diff_content = file_list_section + diff_content
 
             logger.info(f"Retrieved PR diff ({len(diff_content)} characters)")
+            self._cache_put(cache_key, diff_content)
             return diff_content
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to get PR diff: {e}")
             return ""
 
+    def _download_diff(self, url: str, limit: int) -> str:
+        """
+        Stream a PR diff, stopping once limit characters have been read
+
+        Args:
+            url: API URL of the pull request
+            limit: Number of characters after which the download is abandoned
+
+        Returns:
+            The diff, cut at the last complete line if the limit was reached
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails
+        """
+        response = self.session.get(
+            url,
+            headers={"Accept": "application/vnd.github.v3.diff"},
+            timeout=self.REQUEST_TIMEOUT,
+            stream=True,
+        )
+        try:
+            response.raise_for_status()
+            response.encoding = response.encoding or "utf-8"
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(chunk_size=8192, decode_unicode=True):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= limit:
+                    logger.info(
+                        "Stopped diff download after %d characters (limit %d)",
+                        size,
+                        limit,
+                    )
+                    diff = "".join(chunks)
+                    return diff[: diff.rfind("\n") + 1]
+            return "".join(chunks)
+        finally:
+            # Closing early drops the rest of the body instead of reading it
+            response.close()
+
     def _truncate_diff(
         self, diff: str, files: List[str], max_total: int, max_per_file: int
     ) -> str:
@@ -117,50 +487,84 @@ class GitHubClient:
         reserved_for_files = len(file_list_section)
         available_for_diff = max_total - reserved_for_files
 
-        lines = diff.split("\n")
-        result_lines = []
+        # Walk the diff file by file with str.find instead of splitting it into
+        # lines. Appending a newline lets every line, including the last, end
+        # with "\n", so kept runs of lines are plain slices of the text.
+        text = diff + "\n"
+        end = len(text)
+        remaining = available_for_diff
+        pieces = []
         current_file = None
-        current_file_lines = 0
-        total_chars = 0
-        included_files = set()
-        skipped_files = set()
-
-        for line in lines:
-            # Track which file we're in
-            if line.startswith("diff --git"):
+        truncated = False
+        pos = 0
+
+        while pos < end:
+            next_header = text.find(_DIFF_HEADER_LINE, pos)
+            section_end = next_header + 1 if next_header != -1 else end
+
+            if text.startswith(_DIFF_HEADER, pos):
                 # Extract filename from "diff --git a/path b/path"
-                parts = line.split(" ")
+                header_end = text.find("\n", pos)
+                parts = text[pos:header_end].split(" ")
                 if len(parts) >= 4:
-                    current_file = parts[3].lstrip("b/")
-                    included_files.add(current_file)
-                current_file_lines = 0
-
-            # Check limits
-            if total_chars + len(line) + 1 > available_for_diff:
-                # Stop if we exceed available limit
-                if result_lines and not result_lines[-1].startswith("... "):
-                    result_lines.append(
-                        "\n... (diff truncated due to size limits) ...\n"
-                    )
+                    current_file = parts[3].removeprefix("b/")
+
+            # Keep the header plus max_per_file lines of the current file
+            keep_end = section_end
+            if current_file:
+                keep_end = self._skip_lines(text, pos, section_end, max_per_file + 1)
+
+            if keep_end - pos > remaining:
+                cut = text.rfind("\n", pos, pos + max(remaining, 0)) + 1
+                if cut > pos:
+                    pieces.append(text[pos:cut])
+                truncated = True
+                break
+            pieces.append(text[pos:keep_end])
+            remaining -= keep_end - pos
+
+            # Skipped lines still stop the walk if one alone exceeds the budget
+            if section_end - keep_end > remaining and self._has_line_over(
+                text, keep_end, section_end, remaining
+            ):
+                truncated = True
                 break
 
-            if current_file and current_file_lines > max_per_file:
-                # Skip this file's remaining lines but track as skipped
-                if line.startswith("diff --git"):
-                    current_file_lines = 0
-                else:
-                    skipped_files.add(current_file)
-                    continue
-
-            result_lines.append(line)
-            total_chars += len(line) + 1
-            current_file_lines += 1
+            pos = section_end
 
-        diff_content = "\n".join(result_lines)
+        diff_content = "".join(pieces)
+        last_line_start = diff_content.rfind("\n", 0, len(diff_content) - 1) + 1
+        if (
+            truncated
+            and diff_content
+            and not diff_content.startswith(_TRUNCATION_PREFIX, last_line_start)
+        ):
+            diff_content += "\n... (diff truncated due to size limits) ...\n"
+        else:
+            diff_content = diff_content[:-1]
 
         # Build final output with file list and diff
         return file_list_section + diff_content
 
+    @staticmethod
+    def _skip_lines(text: str, start: int, end: int, count: int) -> int:
+        """Return the offset just past count newline-terminated lines, capped at end"""
+        for _ in range(count):
+            start = text.find("\n", start, end) + 1
+            if not start:
+                return end
+        return start
+
+    @staticmethod
+    def _has_line_over(text: str, start: int, end: int, limit: int) -> bool:
+        """Check whether any line in text[start:end], with its newline, exceeds limit"""
+        while start < end:
+            line_end = text.find("\n", start, end)
+            if line_end - start + 1 > limit:
+                return True
+            start = line_end + 1
+        return False
+
     def _build_file_list_section(self, files: List[str]) -> str:
         """Build a section listing all edited files for context"""
         if not files:
@@ -174,16 +578,31 @@ class GitHubClient:
 
 """
 
-    def comment_on_pr(self, body: str) -> bool:
-        """Post a comment on the PR"""
+    def comment_on_pr(self, body: str, suggestion: bool = False) -> bool:
+        """
+        Post a comment on the PR
+
+        Args:
+            body: Comment text (markdown)
+            suggestion: Tag the comment with SUGGESTION_MARKER so later runs
+                detect it in has_existing_changelog_suggestion
+
+        Returns:
+            True if successful, False otherwise
+        """
         if not self.pr_number:
             logger.warning("No PR number found, cannot comment")
             return False
 
-        url = f"{self.api_url}/repos/{self.repo_owner}/{self.repo_name}/issues/{self.pr_number}/comments"
+        if suggestion:
+            body = f"{SUGGESTION_MARKER}\n{body}"
+
+        url = self._issue_comments_url
 
         try:
-            response = self.session.post(url, json={"body": body})
+            response = self.session.post(
+                url, json={"body": body}, timeout=self.REQUEST_TIMEOUT
+            )
             response.raise_for_status()
             logger.info("Successfully posted comment on PR")
             return True
@@ -213,41 +632,32 @@ class GitHubClient:
             logger.warning("No PR number found")
             return False
 
-        url = f"{self.api_url}/repos/{self.repo_owner}/{self.repo_name}/issues/{self.pr_number}/comments"
+        url = self._issue_comments_url
+
+        overview = self._get_pr_overview()
+        if overview and not overview["comments"]["pageInfo"]["hasNextPage"]:
+            pages = [
+                [
+                    {"id": node["databaseId"], "body": node["body"]}
+                    for node in overview["comments"]["nodes"]
+                ]
+            ]
+        else:
+            pages = self._paginate(url, fields=("id", "body"))
 
         try:
             # Get all comments on the PR
-            page = 1
-            while True:
-                response = self.session.get(url, params={"page": page, "per_page": 100})
-                response.raise_for_status()
-
-                comments = response.json()
-                if not comments:
-                    break
-
+            for comments in pages:
                 # Check if any comment contains changelog generation markers
                 for comment in comments:
                     body = comment.get("body", "")
                     # Look for markers that indicate this is from our action
-                    if any(
-                        marker in body
-                        for marker in [
-                            "I've generated a changelog entry",
-                            "I've converted the legacy changelog entry",
-                            "Found changes to",
-                            "changelog entry does not comply",
-                            "No changelog entry found",
-                            "Legacy changelog entry found",
-                        ]
-                    ):
+                    if SUGGESTION_MARKER in body or _SUGGESTION_MARKERS_RE.search(body):
                         logger.info(
                             f"Found existing changelog suggestion in comment {comment.get('id')}"
                         )
                         return True
 
-                page += 1
-
             logger.debug("No existing changelog suggestions found on PR")
             return False
 
@@ -288,7 +698,7 @@ class GitHubClient:
             logger.warning("No PR number found")
             return False
 
-        url = f"{self.api_url}/repos/{self.repo_owner}/{self.repo_name}/pulls/{self.pr_number}/comments"
+        url = self._pr_review_comments_url
 
         # Build the comment payload
         comment_data = {
@@ -305,7 +715,9 @@ class GitHubClient:
             comment_data["start_side"] = side
 
         try:
-            response = self.session.post(url, json=comment_data)
+            response = self.session.post(
+                url, json=comment_data, timeout=self.REQUEST_TIMEOUT
+            )
             response.raise_for_status()
             logger.info(
                 f"Successfully created review comment with suggestion on line {line}"
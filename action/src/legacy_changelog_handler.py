@@ -1,13 +1,115 @@
 """Legacy changelog detection and conversion handler"""
 
+import functools
 import logging
 import re
 from typing import Any, Dict, List, Optional, Tuple
 
-from changelog_generator import ChangelogGenerator
-
 logger = logging.getLogger(__name__)
 
+# Keywords of sections for changes that haven't been released yet
+_UNRELEASED_RE = re.compile(
+    r"unreleased|upcoming|next release|in development", re.IGNORECASE
+)
+# Hunk header: @@ -old_start[,old_count] +new_start[,new_count] @@
+_HUNK_RE = re.compile(r"@@ -(\d+)(?:,\d+)? \+(\d+)")
+# Markdown headings ("## 1.2.3", "### Fixed")
+_HEADING_RE = re.compile(r"^#+\s+", re.MULTILINE)
+# Bullet list items ("- Fixed bug", "* Added feature")
+_BULLET_RE = re.compile(r"^\s*[-*+]\s+", re.MULTILINE)
+# Version with optional date, e.g. "## 1.2.3 - 2024-10-24". A leading "##" or
+# whitespace doesn't change what is captured, so the pattern starts at the
+# version itself rather than trying an optional prefix at every position.
+_VERSION_RE = re.compile(
+    r"v?(\d+\.\d+(?:\.\d+)?(?:-\w+\.\d+)?)(?:\s*[-–]\s*(\d{4}-\d{2}-\d{2}))?"
+)
+
+# Default allowed types when the caller doesn't configure any
+_DEFAULT_CHANGELOG_TYPES = (
+    "added",
+    "changed",
+    "deprecated",
+    "removed",
+    "fixed",
+    "security",
+    "dependency_update",
+    "other",
+)
+
+# Characters of the PR diff shown in the relevance check
+_RELEVANCE_DIFF_CHARS = 1500
+
+_RELEVANCE_CHECK_TEMPLATE = """
+IMPORTANT - RELEVANCE CHECK:
+Before conversion, verify that the changelog entry is actually relevant to the PR changes:
+- Look at the PR diff to understand what code actually changed
+- Check if the entry text describes related changes or is completely unrelated
+- If the entry is CLEARLY UNRELATED (e.g., discusses "elephants" when code is about auth),
+  REJECT by returning: title: "IRRELEVANT_ENTRY"
+- Only convert entries reasonably related to or describing the actual code changes
+
+PR Code Changes (diff):
+```
+{pr_diff}...
+```
+"""
+
+_CONVERSION_PROMPT_TEMPLATE = """I have extracted a changelog entry from a legacy changelog file.
+I need to convert it into logchange-formatted YAML while preserving the original text and intent.
+
+{validation_check}
+
+CONVERSION INSTRUCTIONS:
+1. **Validate relevance**: Ensure the entry describes changes actually made in the code (see PR diff above)
+2. **Preserve the original text**: Keep the wording and meaning as-is when relevant
+3. **Gentle rewriting only**: Only rewrite if it's grammatically incorrect or unclear
+4. **Extract metadata**: Look for issue links (#123, JIRA-123, etc.) and additional contributors mentioned in the text
+5. **Determine type**: Infer the type from the content. Allowed types: {changelog_types}
+6. **Create title**: Use the existing entry text or PR title to create a clear, concise title
+7. **Valid YAML**: Ensure the generated YAML is valid and properly formatted
+8. **Output format**: Output ONLY the YAML with no additional text, markdown, or comments
+9. **Rejection case**: If entry is clearly unrelated to code changes, output: title: "IRRELEVANT_ENTRY"
+
+Legacy Changelog Entry:
+```
+{entry_text}
+```
+
+PR Title: {pr_title}
+
+PR Author: {pr_author}
+
+Entry Type Detected: {entry_type}
+
+{validation_section}
+
+**IMPORTANT: Always include the authors field**
+- The authors field is REQUIRED and must include at least the PR author ({pr_author})
+- Extract any additional authors from the legacy entry text if mentioned
+- Format: authors: [{{name: "Author Name"}}]
+
+Now convert this into logchange format, validating that it's relevant to the code changes:"""
+
+
+@functools.lru_cache(maxsize=8)
+def _validation_rules_section(
+    changelog_types: Tuple[str, ...], forbidden_fields: Tuple[str, ...]
+) -> str:
+    """
+    Build the validation rules section once per configuration
+
+    Args:
+        changelog_types: Allowed changelog types
+        forbidden_fields: Fields that must not be used
+
+    Returns:
+        Validation rules section as a string
+    """
+    # Imported here so detection-only runs don't load the Claude client
+    from changelog_generator import build_validation_rules_section
+
+    return build_validation_rules_section(list(changelog_types), list(forbidden_fields))
+
 
 class LegacyChangelogHandler:
     """Detect and handle legacy changelog entries"""
@@ -23,6 +125,13 @@ class LegacyChangelogHandler:
         """
         self.legacy_changelog_paths = legacy_changelog_paths or []
         self.is_enabled = len(self.legacy_changelog_paths) > 0
+        # str.endswith checks every suffix in one call; an exact match is a
+        # suffix match too
+        self._path_suffixes = tuple(self.legacy_changelog_paths)
+        # (diff, result) of the last _parse_diff call
+        self._parsed_diff: Optional[
+            Tuple[str, Tuple[List[Tuple[int, str]], List[Tuple[int, str]]]]
+        ] = None
 
         if self.is_enabled:
             logger.info(
@@ -45,14 +154,10 @@ class LegacyChangelogHandler:
             logger.debug("Legacy changelog detection is disabled, skipping search")
             return []
 
-        legacy_files = []
-        for pr_file in pr_files:
-            # Check if file matches any legacy changelog pattern
-            for legacy_path in self.legacy_changelog_paths:
-                # Support exact matches and patterns like 'docs/CHANGELOG.md'
-                if pr_file.endswith(legacy_path) or pr_file == legacy_path:
-                    legacy_files.append(pr_file)
-                    break
+        # Support exact matches and patterns like 'docs/CHANGELOG.md'
+        legacy_files = [
+            pr_file for pr_file in pr_files if pr_file.endswith(self._path_suffixes)
+        ]
 
         logger.info(f"Found {len(legacy_files)} legacy changelog file(s) in PR")
         return legacy_files
@@ -69,24 +174,10 @@ class LegacyChangelogHandler:
         Returns:
             Extracted changelog entry text or None if not found
         """
-        lines = diff_content.split("\n")
-        added_lines = []
-        in_hunk = False
-
-        for line in lines:
-            # Track when we're in a hunk
-            if line.startswith("@@"):
-                in_hunk = True
-                continue
-
-            if in_hunk:
-                # Only capture added lines (starting with '+' but not '+++')
-                if line.startswith("+") and not line.startswith("+++"):
-                    # Remove the '+' prefix
-                    added_lines.append(line[1:])
+        added_lines, _ = self._parse_diff(diff_content)
 
         if added_lines:
-            entry_text = "\n".join(added_lines).strip()
+            entry_text = "\n".join(content for _, content in added_lines).strip()
             logger.debug(f"Extracted changelog entry: {len(entry_text)} characters")
             return entry_text
 
@@ -105,45 +196,8 @@ class LegacyChangelogHandler:
         Returns:
             List of tuples (line_number, line_content) for added lines in the new version
         """
-        lines = diff_content.split("\n")
-        added_lines_with_pos = []
-        current_new_line = 0
-        in_hunk = False
-
-        for line in lines:
-            # Skip lines until we find the hunk header
-            if line.startswith("@@"):
-                # Parse hunk header: @@ -old_start,old_count +new_start,new_count @@
-                try:
-                    parts = line.split(" ")
-                    new_range = parts[2]  # +new_start,new_count
-                    new_start = int(new_range.split(",")[0].lstrip("+"))
-                    current_new_line = new_start
-                except (IndexError, ValueError):
-                    pass
-                in_hunk = True
-                continue
-
-            if not in_hunk:
-                continue
-
-            # Process lines in hunk
-            if line.startswith("@@"):
-                # New hunk, reset
-                continue
-            elif line.startswith("-"):
-                # Removed line - don't increment new line counter
-                pass
-            elif line.startswith("+") and not line.startswith("+++"):
-                # Added line - record it with position
-                content = line[1:]  # Remove '+' prefix
-                added_lines_with_pos.append((current_new_line, content))
-                current_new_line += 1
-            elif not line.startswith("\\"):
-                # Context line (unchanged) - increment counter
-                current_new_line += 1
-
-        return added_lines_with_pos
+        added_lines, _ = self._parse_diff(diff_content)
+        return list(added_lines)
 
     def extract_removed_lines_with_positions(
         self, diff_content: str, legacy_file: str
@@ -158,45 +212,83 @@ class LegacyChangelogHandler:
         Returns:
             List of tuples (line_number, line_content) for removed lines in the old version
         """
-        lines = diff_content.split("\n")
-        removed_lines_with_pos = []
+        _, removed_lines = self._parse_diff(diff_content)
+        return list(removed_lines)
+
+    def _parse_diff(
+        self, diff_content: str
+    ) -> Tuple[List[Tuple[int, str]], List[Tuple[int, str]]]:
+        """
+        Collect the added and removed lines of a diff in a single pass
+
+        The extract_* methods are called one after another on the same diff,
+        so the result for the most recent diff is kept and reused.
+
+        Args:
+            diff_content: The diff output for the changelog file
+
+        Returns:
+            Tuple of (added, removed) lists of (line_number, line_content);
+            added lines are numbered in the new version, removed lines in the old
+        """
+        if self._parsed_diff is not None and self._parsed_diff[0] == diff_content:
+            return self._parsed_diff[1]
+
+        added_lines = []
+        removed_lines = []
         current_old_line = 0
+        current_new_line = 0
         in_hunk = False
 
-        for line in lines:
-            # Skip lines until we find the hunk header
-            if line.startswith("@@"):
-                # Parse hunk header: @@ -old_start,old_count +new_start,new_count @@
-                try:
-                    parts = line.split(" ")
-                    old_range = parts[1]  # -old_start,old_count
-                    old_start = int(old_range.split(",")[0].lstrip("-"))
-                    current_old_line = old_start
-                except (IndexError, ValueError):
-                    pass
+        for line in diff_content.split("\n"):
+            # Dispatch on the first character instead of chained startswith calls
+            marker = line[:1]
+            if marker == "@" and line[:2] == "@@":
+                current_old_line, current_new_line = self._parse_hunk_header(
+                    line, current_old_line, current_new_line
+                )
                 in_hunk = True
                 continue
 
+            # Skip lines until we find the first hunk header
             if not in_hunk:
                 continue
 
-            # Process lines in hunk
-            if line.startswith("@@"):
-                # New hunk, reset
-                continue
-            elif line.startswith("-") and not line.startswith("---"):
-                # Removed line - record it with position
-                content = line[1:]  # Remove '-' prefix
-                removed_lines_with_pos.append((current_old_line, content))
+            if marker == "+":
+                # Added line - only the new version has it
+                if line[:3] != "+++":
+                    added_lines.append((current_new_line, line[1:]))
+                current_new_line += 1
+            elif marker == "-":
+                # Removed line - only the old version has it
+                if line[:3] != "---":
+                    removed_lines.append((current_old_line, line[1:]))
                 current_old_line += 1
-            elif line.startswith("+"):
-                # Added line - don't increment old line counter
-                pass
-            elif not line.startswith("\\"):
-                # Context line (unchanged) - increment counter
+            elif marker != "\\":
+                # Context line (unchanged) - present in both versions
                 current_old_line += 1
+                current_new_line += 1
 
-        return removed_lines_with_pos
+        result = (added_lines, removed_lines)
+        self._parsed_diff = (diff_content, result)
+        return result
+
+    @staticmethod
+    def _parse_hunk_header(line: str, old_line: int, new_line: int) -> Tuple[int, int]:
+        """
+        Parse the start lines of a hunk header
+
+        Args:
+            line: Hunk header: @@ -old_start,old_count +new_start,new_count @@
+            old_line: Old line number to keep if the header is malformed
+            new_line: New line number to keep if the header is malformed
+
+        Returns:
+            Tuple of (old_start, new_start)
+        """
+        if match := _HUNK_RE.match(line):
+            return int(match[1]), int(match[2])
+        return old_line, new_line
 
     def group_consecutive_lines(
         self, added_lines: List[Tuple[int, str]]
@@ -248,21 +340,16 @@ class LegacyChangelogHandler:
         Returns:
             Type: 'markdown', 'plain_text', 'unreleased', or 'other'
         """
-        lower_text = entry_text.lower()
-
         # Check for "Unreleased" or "Upcoming" sections FIRST (before markdown)
-        if any(
-            keyword in lower_text
-            for keyword in ["unreleased", "upcoming", "next release", "in development"]
-        ):
+        if _UNRELEASED_RE.search(entry_text):
             return "unreleased"
 
         # Check for markdown-style entries (## Version, ### Section)
-        if re.search(r"^#+\s+", entry_text, re.MULTILINE):
+        if _HEADING_RE.search(entry_text):
             return "markdown"
 
         # Check for bullet point lists (typical changelog format)
-        if re.search(r"^[\s]*[-*+]\s+", entry_text, re.MULTILINE):
+        if _BULLET_RE.search(entry_text):
             return "plain_text"
 
         return "other"
@@ -279,9 +366,12 @@ class LegacyChangelogHandler:
         Returns:
             Tuple of (version, date) or (None, None) if not found
         """
-        # Pattern: ## 1.2.3 - 2024-10-24
-        version_pattern = r"(?:##|###)?\s*(?:v?(\d+\.\d+(?:\.\d+)?(?:-\w+\.\d+)?))(?:\s*[-–]\s*(\d{4}-\d{2}-\d{2}))?"
-        match = re.search(version_pattern, entry_text)
+        # Every version the pattern accepts has a dot ("1.2"); text without one
+        # can't match, so skip the regex scan
+        if "." not in entry_text:
+            return None, None
+
+        match = _VERSION_RE.search(entry_text)
 
         if match:
             version = match.group(1)
@@ -314,7 +404,7 @@ class LegacyChangelogHandler:
             "version": version,
             "date": date,
             "summary": summary,
-            "line_count": len(entry_text.split("\n")),
+            "line_count": entry_text.count("\n") + 1,
             "char_count": len(entry_text),
         }
 
@@ -347,82 +437,29 @@ class LegacyChangelogHandler:
 
         # Use provided types or defaults
         if changelog_types is None:
-            changelog_types = [
-                "added",
-                "changed",
-                "deprecated",
-                "removed",
-                "fixed",
-                "security",
-                "dependency_update",
-                "other",
-            ]
-
-        # Create a temporary generator to access the validation rules building method
-        # We need to pass a dummy API key since we're only using the method, not making API calls
-        temp_generator = ChangelogGenerator(
-            api_key="dummy",
-            changelog_types=changelog_types,
-            forbidden_fields=forbidden_fields or [],
-        )
-        validation_section = temp_generator._build_validation_rules_section(
-            changelog_types, forbidden_fields
+            changelog_types = _DEFAULT_CHANGELOG_TYPES
+
+        validation_section = _validation_rules_section(
+            tuple(changelog_types), tuple(forbidden_fields or ())
         )
 
         validation_check = ""
         if pr_diff:
-            validation_check = """
-IMPORTANT - RELEVANCE CHECK:
-Before conversion, verify that the changelog entry is actually relevant to the PR changes:
-- Look at the PR diff to understand what code actually changed
-- Check if the entry text describes related changes or is completely unrelated
-- If the entry is CLEARLY UNRELATED (e.g., discusses "elephants" when code is about auth),
-  REJECT by returning: title: "IRRELEVANT_ENTRY"
-- Only convert entries reasonably related to or describing the actual code changes
-
-PR Code Changes (diff):
-```
-{pr_diff[:1500]}...
-```
-"""
-
-        prompt = f"""I have extracted a changelog entry from a legacy changelog file.
-I need to convert it into logchange-formatted YAML while preserving the original text and intent.
-
-{validation_check}
-
-CONVERSION INSTRUCTIONS:
-1. **Validate relevance**: Ensure the entry describes changes actually made in the code (see PR diff above)
-2. **Preserve the original text**: Keep the wording and meaning as-is when relevant
-3. **Gentle rewriting only**: Only rewrite if it's grammatically incorrect or unclear
-4. **Extract metadata**: Look for issue links (#123, JIRA-123, etc.) and additional contributors mentioned in the text
-5. **Determine type**: Infer the type from the content. Allowed types: {', '.join(changelog_types)}
-6. **Create title**: Use the existing entry text or PR title to create a clear, concise title
-7. **Valid YAML**: Ensure the generated YAML is valid and properly formatted
-8. **Output format**: Output ONLY the YAML with no additional text, markdown, or comments
-9. **Rejection case**: If entry is clearly unrelated to code changes, output: title: "IRRELEVANT_ENTRY"
-
-Legacy Changelog Entry:
-```
-{entry_text}
-```
-
-PR Title: {pr_title}
-
-PR Author: {pr_author}
-
-Entry Type Detected: {entry_type}
-
-{validation_section}
-
-**IMPORTANT: Always include the authors field**
-- The authors field is REQUIRED and must include at least the PR author ({pr_author})
-- Extract any additional authors from the legacy entry text if mentioned
-- Format: authors: [{{name: "Author Name"}}]
-
-Now convert this into logchange format, validating that it's relevant to the code changes:"""
+            validation_check = _RELEVANCE_CHECK_TEMPLATE.format_map(
+                {"pr_diff": pr_diff[:_RELEVANCE_DIFF_CHARS]}
+            )
 
-        return prompt
+        return _CONVERSION_PROMPT_TEMPLATE.format_map(
+            {
+                "validation_check": validation_check,
+                "changelog_types": ", ".join(changelog_types),
+                "entry_text": entry_text,
+                "pr_title": pr_title,
+                "pr_author": pr_author,
+                "entry_type": entry_type,
+                "validation_section": validation_section,
+            }
+        )
 
     def should_fail_on_conflict(
         self, legacy_files: List[str], logchange_files: List[str]
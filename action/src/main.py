@@ -7,7 +7,7 @@ import logging
 import os
 import re
 import sys
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
 
 # Configure logging
 logging.basicConfig(
@@ -18,7 +18,6 @@ logger = logging.getLogger(__name__)
 # Add src directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from changelog_generator import ChangelogGenerator
 from changelog_validator import ChangelogValidator
 from config import ActionConfig
 from exceptions import ConfigurationError, GenerationError
@@ -26,6 +25,9 @@ from github_client import GitHubClient
 from legacy_changelog_handler import LegacyChangelogHandler
 from pr_metadata_extractor import PRMetadataExtractor
 
+if TYPE_CHECKING:
+    from changelog_generator import ChangelogGenerator
+
 
 def generate_changelog_slug(pr_number: int, title: str = "") -> str:
     """
@@ -132,7 +134,7 @@ class LogchangeAction:
             logger.error(f"Failed to initialize action: {e}", exc_info=True)
             raise
 
-    def _initialize_generator(self) -> ChangelogGenerator:
+    def _initialize_generator(self) -> Optional["ChangelogGenerator"]:
         """Initialize Claude changelog generator with graceful degradation.
 
         Returns:
@@ -148,11 +150,15 @@ class LogchangeAction:
             )
             return None
 
+        # Imported lazily: runs that never call Claude skip loading the generator
+        from changelog_generator import ChangelogGenerator
+
         try:
             return ChangelogGenerator(
                 api_key=self.claude_token,
                 model=self.claude_model,
-                system_prompt=self.claude_system_prompt,
+                # An empty input means the built-in prompt, not an empty one
+                system_prompt=self.claude_system_prompt or None,
                 changelog_language=self.changelog_language,
                 max_tokens_context=self.max_tokens_context,
                 max_tokens_per_file=self.max_tokens_per_file,
@@ -168,6 +174,9 @@ class LogchangeAction:
                     if self.external_issue_url_template
                     else None
                 ),
+                skip_files_regex=self.skip_files_regex or None,
+                # Generation is enabled, so a request is likely to follow
+                prewarm=True,
             )
         except Exception as e:
             logger.error(f"Failed to initialize Claude generator: {e}", exc_info=True)
@@ -490,7 +499,9 @@ class LogchangeAction:
                 # Post as suggestion (respect dry-run mode)
                 suggestion_comment = self._format_suggestion_comment(generated_entry)
                 if not self.dry_run:
-                    self.github_client.comment_on_pr(suggestion_comment)
+                    self.github_client.comment_on_pr(
+                        suggestion_comment, suggestion=True
+                    )
                 else:
                     logger.info(
                         f"[DRY-RUN] Would post suggestion:\n{suggestion_comment}"
@@ -0,0 +1,538 @@
+"""Tests for Claude changelog generator"""
+
+import json
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "action", "src"))
+
+import pytest
+import requests
+from changelog_generator import ChangelogGenerator
+from exceptions import GenerationError
+
+
+def _api_response(text, usage=None, stop_reason="end_turn"):
+    """Build a fake Claude API response, readable as JSON or as an SSE stream"""
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = {
+        "content": [{"type": "text", "text": text}],
+        "usage": usage or {},
+        "stop_reason": stop_reason,
+    }
+    events = [
+        {"type": "message_start", "message": {"usage": usage or {}}},
+        {"type": "content_block_start", "index": 0},
+        {"type": "content_block_delta", "delta": {"type": "text_delta", "text": text}},
+        {"type": "content_block_stop", "index": 0},
+        {"type": "message_delta", "delta": {"stop_reason": stop_reason}},
+        {"type": "message_stop"},
+    ]
+    lines = []
+    for event in events:
+        lines += [f"event: {event['type']}", f"data: {json.dumps(event)}", ""]
+    response.iter_lines.return_value = lines
+    return response
+
+
+def _sent_payload(session):
+    """Decode the JSON body of the last request made through a mocked session"""
+    return json.loads(session.post.call_args.kwargs["data"])
+
+
+class TestChangelogGenerator:
+    """Test changelog generation request building and response handling"""
+
+    @pytest.fixture
+    def generator(self):
+        """Create generator with a mocked HTTP session"""
+        gen = ChangelogGenerator(api_key="test-key", prewarm=False)
+        gen.session = MagicMock()
+        return gen
+
+    @pytest.fixture
+    def pr_info(self):
+        """Minimal PR info from a GitHub event"""
+        return {
+            "title": "Add login page",
+            "body": "Fixes #12",
+            "user": {"login": "octocat", "html_url": "https://github.com/octocat"},
+            "labels": [{"name": "feature"}],
+        }
+
+    def test_system_prompt_marked_for_caching(self, generator, pr_info):
+        """Test that the system prompt is sent as a cacheable block"""
+        generator.session.post.return_value = _api_response("title: Add login page")
+
+        generator.generate("diff", pr_info)
+
+        payload = _sent_payload(generator.session)
+        assert payload["system"] == [
+            {
+                "type": "text",
+                "text": generator.system_prompt,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+
+    def test_empty_system_prompt_omitted(self, pr_info):
+        """Test that an empty system prompt is not sent"""
+        gen = ChangelogGenerator(api_key="test-key", prewarm=False, system_prompt="")
+        gen.session = MagicMock()
+        gen.session.post.return_value = _api_response("title: Add login page")
+
+        gen.generate("diff", pr_info)
+
+        payload = _sent_payload(gen.session)
+        assert "system" not in payload
+
+    def test_user_message_static_prefix_first(self, generator, pr_info):
+        """Test that config-only content is a cached block ahead of PR details"""
+        generator.session.post.return_value = _api_response("title: Add login page")
+
+        generator.generate("+ new line", pr_info)
+
+        payload = _sent_payload(generator.session)
+        static_block, pr_block, diff_block, footer_block = payload["messages"][0][
+            "content"
+        ]
+        assert static_block["cache_control"] == {"type": "ephemeral"}
+        assert "REQUIRED fields: title" in static_block["text"]
+        assert "Add login page" not in static_block["text"]
+        assert "cache_control" not in pr_block
+        assert "**PR Title:** Add login page" in pr_block["text"]
+        assert pr_block["text"].endswith("```diff\n")
+        assert diff_block == {"type": "text", "text": "+ new line"}
+        assert footer_block["text"].startswith("\n```")
+        assert "primary author (octocat)" in footer_block["text"]
+
+    def test_empty_diff_sends_placeholder(self, generator, pr_info):
+        """Test that a missing diff doesn't produce an empty text block"""
+        generator.session.post.return_value = _api_response("title: Add login page")
+
+        assert generator.generate("", pr_info) is not None
+
+        content = _sent_payload(generator.session)["messages"][0]["content"]
+        assert all(block["text"] for block in content)
+        assert content[2]["text"] == "(no diff available)"
+
+    def test_validation_rules_not_repeated_with_default_prompt(self, generator):
+        """Test that the default system prompt alone carries the full rules"""
+        static_text = generator._static_user_block["text"]
+
+        assert "YAML Field Validation Rules" in generator.system_prompt
+        assert "Allowed entry types" not in static_text
+        assert "system prompt" in static_text
+
+    def test_action_defaults_use_default_system_prompt(self, monkeypatch):
+        """Test that the action's empty claude-system-prompt input keeps the rules deduplicated"""
+        monkeypatch.setenv("INPUT_ON_MISSING_ENTRY", "generate")
+        monkeypatch.setenv("INPUT_CLAUDE_TOKEN", "action-key")
+        monkeypatch.setattr(ChangelogGenerator, "_prewarm", lambda self, session: None)
+        from main import LogchangeAction
+
+        gen = LogchangeAction().generator
+
+        assert "YAML Field Validation Rules" in gen.system_prompt
+        assert "Allowed entry types" not in gen._static_user_block["text"]
+
+    def test_validation_rules_in_user_message_with_custom_prompt(self):
+        """Test that rules are sent in the user message for custom system prompts"""
+        gen = ChangelogGenerator(
+            api_key="k",
+            prewarm=False,
+            system_prompt="Be brief.",
+            forbidden_fields=["modules"],
+        )
+        static_text = gen._static_user_block["text"]
+
+        assert "Allowed entry types" in static_text
+        assert "FORBIDDEN fields: modules" in static_text
+
+    def test_generate_returns_yaml(self, generator, pr_info):
+        """Test that generated YAML is extracted from a code block"""
+        generator.session.post.return_value = _api_response(
+            "```yaml\ntitle: Add login page\ntype: added\n```",
+            usage={"input_tokens": 10, "cache_read_input_tokens": 900},
+        )
+
+        result = generator.generate("diff", pr_info)
+
+        assert result == "title: Add login page\ntype: added"
+
+    def test_generate_invalid_yaml_returns_none(self, generator, pr_info):
+        """Test that unparseable output is rejected"""
+        generator.session.post.return_value = _api_response("title: [unclosed")
+
+        assert generator.generate("diff", pr_info) is None
+
+    def test_generate_api_error_returns_none(self, generator, pr_info):
+        """Test that non-200 responses are reported as failures"""
+        response = MagicMock()
+        response.status_code = 500
+        response.text = "Internal error"
+        generator.session.post.return_value = response
+
+        assert generator.generate("diff", pr_info) is None
+
+    def test_system_prompt_built_once_per_config(self):
+        """Test that generators with the same config reuse the cached prompt"""
+        first = ChangelogGenerator(
+            api_key="a", prewarm=False, changelog_types=["added", "fixed"]
+        )
+        hits = ChangelogGenerator._build_system_prompt.cache_info().hits
+
+        second = ChangelogGenerator(
+            api_key="b", prewarm=False, changelog_types=["added", "fixed"]
+        )
+
+        assert ChangelogGenerator._build_system_prompt.cache_info().hits == hits + 1
+        assert second.system_prompt is first.system_prompt
+        assert "added, fixed" in second.system_prompt
+
+    def test_generate_accepts_json_output(self, generator, pr_info):
+        """Test that JSON-formatted output is accepted via the JSON fast path"""
+        generator.session.post.return_value = _api_response(
+            '{"title": "Add login page", "type": "added"}'
+        )
+
+        with patch("changelog_generator.yaml.load") as yaml_load:
+            result = generator.generate("diff", pr_info)
+
+        assert result == '{"title": "Add login page", "type": "added"}'
+        yaml_load.assert_not_called()
+
+    def test_generate_batch_preserves_order(self, generator, pr_info):
+        """Test that batch generation returns results in input order"""
+
+        def fake_post(url, data, timeout, stream):
+            text = json.loads(data)["messages"][0]["content"][2]["text"]
+            title = "first" if "diff-one" in text else "second"
+            return _api_response(f"title: {title}")
+
+        generator.session.post.side_effect = fake_post
+
+        results = generator.generate_batch(
+            [("diff-one", pr_info), ("diff-two", pr_info)]
+        )
+
+        assert results == ["title: first", "title: second"]
+
+    def test_generate_batch_empty(self, generator):
+        """Test that an empty batch makes no requests"""
+        assert generator.generate_batch([]) == []
+        generator.session.post.assert_not_called()
+
+    def test_truncate_diff_within_budget_unchanged(self, generator):
+        """Test that small diffs are passed through as-is"""
+        diff = "diff --git a/app.py b/app.py\n+print('hi')\n"
+        assert generator._truncate_diff(diff) == diff
+
+    def test_truncate_diff_per_file_limit(self):
+        """Test that each file is capped at max_tokens_per_file"""
+        gen = ChangelogGenerator(api_key="k", prewarm=False, max_tokens_per_file=10)
+        long_file = "diff --git a/a.py b/a.py\n" + "+line\n" * 100
+        short_file = "diff --git a/b.py b/b.py\n+short\n"
+
+        result = gen._truncate_diff(long_file + short_file)
+
+        assert "[truncated" in result
+        assert result.endswith(short_file)
+        assert len(result) < len(long_file)
+
+    def test_truncate_diff_skips_lockfiles_and_binaries(self, generator):
+        """Test that lock files and binary files are reduced to their header"""
+        diff = (
+            "diff --git a/package-lock.json b/package-lock.json\n+{}\n"
+            "diff --git a/logo.png b/logo.png\nBinary files a/logo.png and b/logo.png differ\n"
+            "diff --git a/app.py b/app.py\n+code\n"
+        )
+
+        result = generator._truncate_diff(diff)
+
+        assert "+{}" not in result
+        assert "Binary files" not in result
+        assert result.count("omitted") == 2
+        assert "+code" in result
+
+    def test_truncate_diff_skip_files_regex(self):
+        """Test that files matching skip_files_regex are reduced to their header"""
+        gen = ChangelogGenerator(api_key="k", prewarm=False, skip_files_regex=r"^docs/")
+        diff = (
+            "diff --git a/docs/guide.md b/docs/guide.md\n+docs text\n"
+            "diff --git a/app.py b/app.py\n+code\n"
+        )
+
+        result = gen._truncate_diff(diff)
+
+        assert "+docs text" not in result
+        assert "diff --git a/docs/guide.md b/docs/guide.md" in result
+        assert "+code" in result
+
+    def test_truncate_diff_drops_context_before_cutting(self):
+        """Test that over-budget files keep their changed lines over context"""
+        gen = ChangelogGenerator(api_key="k", prewarm=False, max_tokens_per_file=20)
+        diff = (
+            "diff --git a/a.py b/a.py\n@@ -1,12 +1,12 @@\n"
+            + " unchanged\n" * 10
+            + "-old\n+new\n"
+        )
+
+        result = gen._truncate_diff(diff)
+
+        assert "unchanged" not in result
+        assert result.endswith("@@ -1,12 +1,12 @@\n-old\n+new\n")
+
+    def test_truncate_diff_total_limit(self):
+        """Test that the whole diff is capped at max_tokens_context"""
+        gen = ChangelogGenerator(api_key="k", prewarm=False, max_tokens_context=20)
+        diff = "".join(f"diff --git a/f{i}.py b/f{i}.py\n+x\n" for i in range(20))
+
+        result = gen._truncate_diff(diff)
+
+        assert len(result) < len(diff)
+        assert "more file(s) omitted" in result
+
+    def test_max_output_tokens_sent(self, pr_info):
+        """Test that the configured output budget is sent to the API"""
+        gen = ChangelogGenerator(api_key="k", prewarm=False, max_output_tokens=300)
+        gen.session = MagicMock()
+        gen.session.post.return_value = _api_response("title: x")
+
+        gen.generate("diff", pr_info)
+
+        assert _sent_payload(gen.session)["max_tokens"] == 300
+
+    def test_stream_response_accumulates_deltas(self, generator, pr_info):
+        """Test that streamed text deltas are joined into the entry"""
+        response = _api_response("")
+        response.iter_lines.return_value = [
+            'data: {"type": "content_block_delta", "delta": {"text": "title: "}}',
+            'data: {"type": "content_block_delta", "delta": {"text": "Streamed"}}',
+            'data: {"type": "message_stop"}',
+        ]
+        generator.session.post.return_value = response
+
+        assert generator.generate("diff", pr_info) == "title: Streamed"
+        assert _sent_payload(generator.session)["stream"] is True
+        response.close.assert_called_once()
+
+    def test_stream_error_event_returns_none(self, generator, pr_info):
+        """Test that an error event in the stream fails generation"""
+        response = _api_response("")
+        response.iter_lines.return_value = [
+            'data: {"type": "error", "error": {"message": "overloaded"}}',
+        ]
+        generator.session.post.return_value = response
+
+        assert generator.generate("diff", pr_info) is None
+
+    def test_truncated_stream_returns_none(self, generator, pr_info):
+        """Test that a stream cut off before message_stop fails generation"""
+        response = _api_response("")
+        response.iter_lines.return_value = [
+            'data: {"type": "content_block_delta", "delta": {"text": "title: Part"}}',
+        ]
+        generator.session.post.return_value = response
+
+        assert generator.generate("diff", pr_info) is None
+
+    def test_non_streaming_mode(self, pr_info):
+        """Test that streaming can be disabled"""
+        gen = ChangelogGenerator(api_key="k", prewarm=False, stream_response=False)
+        gen.session = MagicMock()
+        gen.session.post.return_value = _api_response("title: Buffered")
+
+        assert gen.generate("diff", pr_info) == "title: Buffered"
+        assert "stream" not in _sent_payload(gen.session)
+
+    def test_extract_commit_authors_deduplicated_and_sorted(self, generator):
+        """Test that commit authors are unique and deterministically ordered"""
+        pr_info = {
+            "commits": [
+                {"author": {"login": "zed"}},
+                {"author": {"login": "amy"}},
+                {"author": {"login": "zed"}},
+                {"author": None},
+                {"author": {"name": "No Login"}},
+            ]
+        }
+
+        assert generator._extract_commit_authors(pr_info) == ["amy", "zed"]
+        assert generator._extract_commit_authors({"commits": "bad"}) == []
+
+    def test_session_headers(self):
+        """Test that the session carries the API key and base headers"""
+        gen = ChangelogGenerator(api_key="secret", prewarm=False)
+
+        assert gen.session.headers["x-api-key"] == "secret"
+        assert gen.session.headers["anthropic-version"] == "2023-06-01"
+        assert "x-api-key" not in ChangelogGenerator.BASE_HEADERS
+
+    def test_retry_continues_conversation(self, generator, pr_info):
+        """Test that a retry sends the previous answer and errors, not a new prompt"""
+        generator.session.post.side_effect = [
+            _api_response("title: First try"),
+            _api_response("title: Second try\ntype: added"),
+        ]
+        validator = MagicMock()
+        validator.validate_entry.side_effect = [
+            (False, ["Missing mandatory field: type"]),
+            (True, []),
+        ]
+
+        entry, is_valid, _ = generator.generate_with_validation(
+            "diff", pr_info, validator
+        )
+
+        assert is_valid is True
+        assert entry == "title: Second try\ntype: added"
+        first_request, retry_request = [
+            json.loads(call.kwargs["data"])
+            for call in generator.session.post.call_args_list
+        ]
+        first_turn, answer, correction = retry_request["messages"]
+        assert first_turn == first_request["messages"][0]
+        assert answer == {"role": "assistant", "content": "title: First try"}
+        assert "Missing mandatory field: type" in correction["content"]
+        assert "diff" not in correction["content"]
+
+    def test_validation_fails_after_retries(self, generator, pr_info):
+        """Test that generation gives up after the retry budget"""
+        generator.session.post.side_effect = lambda *a, **k: _api_response("title: x")
+        validator = MagicMock()
+        validator.validate_entry.return_value = (False, ["bad"])
+
+        entry, is_valid, message = generator.generate_with_validation(
+            "diff", pr_info, validator
+        )
+
+        assert entry is None
+        assert is_valid is False
+        assert generator.session.post.call_count == 3
+        assert message == "Entry failed validation: bad"
+
+    def test_output_limit_not_retried(self, generator, pr_info):
+        """Test that a response cut off at max_tokens is not resent at the same budget"""
+        generator.session.post.side_effect = lambda *a, **k: _api_response(
+            "title: x", stop_reason="max_tokens"
+        )
+
+        with pytest.raises(GenerationError):
+            generator.generate_with_validation("diff", pr_info, MagicMock())
+        assert generator.session.post.call_count == 1
+
+        assert generator.generate("diff", pr_info) is None
+
+    def test_session_retries_transient_errors(self):
+        """Test that the session adapter retries rate limits and overload"""
+        gen = ChangelogGenerator(api_key="retry-key", prewarm=False)
+
+        retries = gen.session.get_adapter(gen.api_url).max_retries
+
+        assert retries.total == 4
+        assert {429, 529} <= set(retries.status_forcelist)
+        assert "POST" in retries.allowed_methods
+
+    def test_read_timeouts_not_retried(self):
+        """Test that a POST that timed out while reading is not resent"""
+        from urllib3.exceptions import MaxRetryError, ReadTimeoutError
+
+        error = ReadTimeoutError(None, "/v1/messages", "Read timed out")
+
+        with pytest.raises(MaxRetryError):
+            ChangelogGenerator.RETRY.increment(method="POST", error=error)
+
+    def test_retry_after_wait_capped(self):
+        """Test that a long Retry-After header can't stall the action"""
+        response = MagicMock()
+        response.headers = {"Retry-After": "3600"}
+
+        assert (
+            ChangelogGenerator.RETRY.get_retry_after(response)
+            == ChangelogGenerator.RETRY.MAX_RETRY_AFTER
+        )
+
+    def test_session_shared_per_api_key(self):
+        """Test that generators with the same API key reuse one session"""
+        first = ChangelogGenerator(api_key="shared-key", prewarm=False)
+        second = ChangelogGenerator(
+            api_key="shared-key", prewarm=False, model="other-model"
+        )
+        other = ChangelogGenerator(api_key="different-key", prewarm=False)
+
+        assert first.session is second.session
+        assert other.session is not first.session
+
+    def test_prewarm_ignores_connection_errors(self, generator):
+        """Test that a failed pre-warm request is not raised"""
+        session = MagicMock()
+        session.head.side_effect = requests.exceptions.ConnectionError("offline")
+
+        generator._prewarm(session)
+
+        session.head.assert_called_once()
+
+    def test_generate_many_batches_requests(self, generator, pr_info):
+        """Test that generate_many submits one batch and maps results by custom_id"""
+        created = MagicMock(status_code=200)
+        created.json.return_value = {
+            "id": "batch_1",
+            "processing_status": "in_progress",
+        }
+        status = MagicMock(status_code=200)
+        status.json.return_value = {
+            "id": "batch_1",
+            "processing_status": "ended",
+            "results_url": "https://example.test/results",
+        }
+        message = {"content": [{"type": "text", "text": "title: Add login page"}]}
+        results = MagicMock(status_code=200)
+        results.iter_lines.return_value = [
+            json.dumps(
+                {
+                    "custom_id": "pr-7",
+                    "result": {"type": "succeeded", "message": message},
+                }
+            ),
+            json.dumps({"custom_id": "item-1", "result": {"type": "errored"}}),
+        ]
+        generator.session.post.return_value = created
+        generator.session.get.side_effect = [status, results]
+
+        with patch("changelog_generator.time.sleep") as sleep:
+            entries = generator.generate_many(
+                [("diff a", {**pr_info, "number": 7}), ("diff b", pr_info)]
+            )
+
+        assert entries == {"pr-7": "title: Add login page", "item-1": None}
+        sleep.assert_called_once()
+        sent = generator.session.post.call_args
+        assert sent.args[0].endswith("/v1/messages/batches")
+        batch_requests = sent.kwargs["json"]["requests"]
+        assert [r["custom_id"] for r in batch_requests] == ["pr-7", "item-1"]
+        assert "stream" not in batch_requests[0]["params"]
+
+    def test_generate_many_unique_custom_ids(self, generator, pr_info):
+        """Test that a repeated PR number falls back to an index-based id"""
+        generator.session.post.return_value = MagicMock(status_code=400, text="bad")
+
+        entries = generator.generate_many(
+            [("diff a", {**pr_info, "number": 3}), ("diff b", {**pr_info, "number": 3})]
+        )
+
+        assert entries == {"pr-3": None, "item-1": None}
+        sent = generator.session.post.call_args.kwargs["json"]["requests"]
+        assert [item["custom_id"] for item in sent] == ["pr-3", "item-1"]
+
+    def test_generate_many_batch_error(self, generator, pr_info):
+        """Test that a rejected batch yields None for every item"""
+        generator.session.post.return_value = MagicMock(status_code=400, text="bad")
+
+        entries = generator.generate_many([("diff", {**pr_info, "number": 3})])
+
+        assert entries == {"pr-3": None}
+        generator.session.get.assert_not_called()
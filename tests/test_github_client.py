@@ -0,0 +1,320 @@
+"""Tests for GitHub API client"""
+
+import os
+import sys
+import time
+from unittest.mock import MagicMock
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "action", "src"))
+
+import pytest
+import requests
+from github_client import SUGGESTION_MARKER, GitHubClient
+
+
+def _page_response(items, last_page=None, etag=None):
+    """Build a fake paginated GitHub API response"""
+    response = MagicMock()
+    response.status_code = 200
+    response.headers = {"ETag": etag} if etag else {}
+    response.json.return_value = items
+    response.links = (
+        {"last": {"url": f"https://api.github.test/x?page={last_page}&per_page=100"}}
+        if last_page
+        else {}
+    )
+    return response
+
+
+class TestGitHubClient:
+    """Test GitHub API request handling"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        """Create client for PR #42 with a mocked HTTP session"""
+        monkeypatch.setenv("GITHUB_REPOSITORY_OWNER", "octo")
+        monkeypatch.setenv("GITHUB_REPOSITORY", "octo/repo")
+        client = GitHubClient(
+            "token", "https://api.github.test", {"pull_request": {"number": 42}}
+        )
+        client.session = MagicMock()
+        # Exercise the REST endpoints; GraphQL is covered by its own tests
+        client._graphql_available = False
+        return client
+
+    def test_get_pr_files_single_page(self, client):
+        """Test that a response without a Link header is the only page"""
+        client.session.get.return_value = _page_response(
+            [{"filename": "a.py"}, {"filename": "b.py"}]
+        )
+
+        assert client.get_pr_files() == ["a.py", "b.py"]
+        assert client.session.get.call_count == 1
+
+    def test_get_pr_files_fetches_remaining_pages(self, client):
+        """Test that pages after the first are all fetched and kept in order"""
+
+        def fake_get(url, params, headers, timeout):
+            page = params["page"]
+            return _page_response(
+                [{"filename": f"file{page}.py"}], last_page=3 if page == 1 else None
+            )
+
+        client.session.get.side_effect = fake_get
+
+        assert client.get_pr_files() == ["file1.py", "file2.py", "file3.py"]
+        assert client.session.get.call_count == 3
+
+    def test_existing_suggestion_found_on_later_page(self, client):
+        """Test that comments on every page are checked for action markers"""
+
+        def fake_get(url, params, headers, timeout):
+            if params["page"] == 1:
+                return _page_response([{"id": 1, "body": "LGTM"}], last_page=2)
+            return _page_response(
+                [{"id": 2, "body": "No changelog entry found in this PR"}]
+            )
+
+        client.session.get.side_effect = fake_get
+
+        assert client.has_existing_changelog_suggestion() is True
+
+    def test_get_pr_files_cached_per_head_sha(self, client):
+        """Test that the file list is fetched once per head commit"""
+        client.session.get.return_value = _page_response([{"filename": "a.py"}])
+
+        first = client.get_pr_files()
+        first.append("mutated.py")
+        second = client.get_pr_files()
+
+        assert second == ["a.py"]
+        assert client.session.get.call_count == 1
+
+        client.head_sha = "new-sha"
+        client.get_pr_files()
+        assert client.session.get.call_count == 2
+
+    def test_cache_entries_expire(self, client, monkeypatch):
+        """Test that cached values older than CACHE_TTL are refetched"""
+        client.session.get.return_value = _page_response([{"filename": "a.py"}])
+        client.get_pr_files()
+
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + GitHubClient.CACHE_TTL + 1)
+        client.get_pr_files()
+
+        assert client.session.get.call_count == 2
+
+    def test_failed_fetch_not_cached(self, client):
+        """Test that errors are retried on the next call instead of cached"""
+        client.session.get.side_effect = [
+            requests.exceptions.ConnectionError("offline"),
+            _page_response([{"filename": "a.py"}]),
+        ]
+
+        assert client.get_pr_files() == []
+        assert client.get_pr_files() == ["a.py"]
+
+    def test_not_modified_response_served_from_etag_cache(self, client):
+        """Test that a 304 revalidation reuses the previously fetched body"""
+        client.session.get.return_value = _page_response(
+            [{"filename": "a.py"}], etag='"v1"'
+        )
+        client.get_pr_files()
+
+        client._cache.clear()
+        client.session.get.return_value = MagicMock(status_code=304)
+
+        assert client.get_pr_files() == ["a.py"]
+        assert client.session.get.call_args.kwargs["headers"] == {
+            "If-None-Match": '"v1"'
+        }
+
+    def test_etag_cache_keeps_only_needed_fields(self, client):
+        """Test that file patches are not retained once the names are read"""
+        client.session.get.return_value = _page_response(
+            [{"filename": "a.py", "patch": "+x" * 1000, "status": "added"}],
+            etag='"v1"',
+        )
+
+        assert client.get_pr_files() == ["a.py"]
+        (cached,) = client._etag_cache.values()
+        assert cached[1] == [{"filename": "a.py"}]
+
+    def test_diff_download_stops_at_limit(self, client):
+        """Test that a huge diff is not read past the download limit"""
+        diff_response = MagicMock(encoding="utf-8")
+        chunks = [f"+line {i}\n" * 100 for i in range(1000)]
+        diff_response.iter_content.return_value = iter(chunks)
+        client.session.get.return_value = diff_response
+
+        diff = client.get_pr_diff([], max_total_tokens=1000, max_per_file=10)
+
+        assert diff.startswith("+line 0\n")
+        assert next(diff_response.iter_content.return_value, None) is not None
+        diff_response.close.assert_called_once()
+
+    def test_truncate_diff_per_file_and_total_limits(self, client):
+        """Test that long files are cut per file and the whole diff is capped"""
+        diff = "".join(
+            f"diff --git a/f{i}.py b/f{i}.py\n" + "+line\n" * 10 for i in range(5)
+        )
+
+        result = client._truncate_diff(diff, [], max_total=140, max_per_file=2)
+
+        assert result.startswith("diff --git a/f0.py b/f0.py\n+line\n+line\n")
+        assert "diff --git a/f1.py" in result
+        assert "+line\n+line\n+line" not in result
+        assert result.endswith("\n... (diff truncated due to size limits) ...\n")
+
+    def test_truncate_diff_limits_files_starting_with_b(self, client):
+        """Test that a path like b/b is still recognized as a file for per-file limits"""
+        diff = "diff --git a/b b/b\n" + "+line\n" * 10
+
+        result = client._truncate_diff(diff, [], max_total=100, max_per_file=1)
+
+        assert result == "diff --git a/b b/b\n+line"
+
+    def test_diff_fetched_in_one_request(self, client):
+        """Test that the diff comes straight from the PR endpoint"""
+        diff_response = MagicMock(encoding="utf-8")
+        diff_response.iter_content.return_value = iter(["+small change\n"])
+        client.session.get.return_value = diff_response
+
+        assert client.get_pr_diff(["a.py"]).endswith("\n\n+small change\n")
+
+        client.session.get.assert_called_once()
+        call = client.session.get.call_args
+        assert call.args[0].endswith("/repos/octo/repo/pulls/42")
+        assert call.kwargs["headers"] == {"Accept": "application/vnd.github.v3.diff"}
+
+    def test_file_list_prepended_when_diff_fits(self, client):
+        """Test that the file list leads the diff even when nothing is truncated"""
+        diff_response = MagicMock(encoding="utf-8")
+        diff_response.iter_content.return_value = iter(["+small change\n"])
+        client.session.get.return_value = diff_response
+
+        diff = client.get_pr_diff(["a.py", "b.py"])
+
+        assert diff == client._build_file_list_section(["a.py", "b.py"]) + (
+            "+small change\n"
+        )
+
+    def test_existing_suggestion_on_first_page_stops_pagination(self, client):
+        """Test that later comment pages are not fetched after a match"""
+        client.session.get.return_value = _page_response(
+            [{"id": 1, "body": "I've generated a changelog entry for you"}],
+            last_page=5,
+        )
+
+        assert client.has_existing_changelog_suggestion() is True
+        assert client.session.get.call_count == 1
+
+    def test_suggestion_comment_tagged_and_detected(self, client):
+        """Test that suggestion comments carry the hidden marker used for detection"""
+        assert client.comment_on_pr("Here is an entry", suggestion=True)
+        posted = client.session.post.call_args.kwargs["json"]["body"]
+        assert posted == f"{SUGGESTION_MARKER}\nHere is an entry"
+
+        client.session.get.return_value = _page_response([{"id": 3, "body": posted}])
+        assert client.has_existing_changelog_suggestion() is True
+
+    def test_plain_comment_not_tagged(self, client):
+        """Test that ordinary comments are posted unchanged"""
+        client.comment_on_pr("Please try again")
+
+        assert client.session.post.call_args.kwargs["json"] == {
+            "body": "Please try again"
+        }
+
+    def test_graphql_overview_serves_files_and_comments(self, client):
+        """Test that one GraphQL query answers both the file and comment lookups"""
+        client._graphql_available = True
+        client.session.post.return_value.json.return_value = {
+            "data": {
+                "repository": {
+                    "pullRequest": {
+                        "files": {
+                            "pageInfo": {"hasNextPage": False},
+                            "nodes": [{"path": "a.py"}],
+                        },
+                        "comments": {
+                            "pageInfo": {"hasNextPage": False},
+                            "nodes": [{"databaseId": 9, "body": SUGGESTION_MARKER}],
+                        },
+                    }
+                }
+            }
+        }
+
+        assert client.has_existing_changelog_suggestion() is True
+        assert client.get_pr_files() == ["a.py"]
+        client.session.post.assert_called_once()
+        assert (
+            client.session.post.call_args.args[0] == "https://api.github.test/graphql"
+        )
+        client.session.get.assert_not_called()
+
+    def test_graphql_errors_fall_back_to_rest(self, client):
+        """Test that a failing GraphQL query switches to the REST endpoints"""
+        client._graphql_available = True
+        client.session.post.return_value.json.return_value = {
+            "errors": [{"message": "Resource not accessible"}]
+        }
+        client.session.get.return_value = _page_response([{"filename": "b.py"}])
+
+        assert client.get_pr_files() == ["b.py"]
+        assert client._graphql_available is False
+
+    def test_graphql_url_for_enterprise_server(self):
+        """Test that GitHub Enterprise uses /api/graphql"""
+        client = GitHubClient("token", "https://ghe.example/api/v3", {})
+
+        assert client.graphql_url == "https://ghe.example/api/graphql"
+
+    def test_retry_policy(self):
+        """Test that reads and rate-limited requests are retried, other POSTs are not"""
+        retry = GitHubClient.RETRY
+
+        assert retry.is_retry("GET", 502)
+        assert not retry.is_retry("POST", 502)
+        assert retry.is_retry("POST", 403, has_retry_after=True)
+        assert not retry.is_retry("GET", 403)
+
+    def test_retry_after_wait_capped(self):
+        """Test that a long Retry-After header can't stall the action"""
+        response = MagicMock()
+        response.headers = {"Retry-After": "3600"}
+
+        assert (
+            GitHubClient.RETRY.get_retry_after(response)
+            == GitHubClient.RETRY.MAX_RETRY_AFTER
+        )
+
+    def test_low_rate_limit_waits_for_reset(self, client, monkeypatch):
+        """Test that a nearly exhausted rate limit waits for a reset that is close"""
+        sleeps = []
+        monkeypatch.setattr(time, "sleep", sleeps.append)
+        response = MagicMock()
+        response.headers = {
+            "X-RateLimit-Remaining": "1",
+            "X-RateLimit-Reset": str(time.time() + 10),
+        }
+
+        client._check_rate_limit(response)
+
+        assert len(sleeps) == 1 and 0 < sleeps[0] <= 10
+
+        response.headers["X-RateLimit-Reset"] = str(time.time() + 3600)
+        client._check_rate_limit(response)
+        assert len(sleeps) == 1
+
+    def test_requests_use_timeout(self, client):
+        """Test that GitHub requests cannot hang without a timeout"""
+        client.session.get.return_value = _page_response([])
+        client.get_pr_files()
+        client.comment_on_pr("hi")
+
+        assert client.session.get.call_args.kwargs["timeout"] == client.REQUEST_TIMEOUT
+        assert client.session.post.call_args.kwargs["timeout"] == client.REQUEST_TIMEOUT
@@ -164,6 +164,13 @@ index abc123..def456 100644
         assert version is None
         assert date is None
 
+    def test_extract_version_requires_dotted_number(self, handler):
+        """Test that text without a dotted version number yields nothing"""
+        assert handler.extract_version_and_date("Release 2 - 2024-10-24") == (
+            None,
+            None,
+        )
+
     def test_build_legacy_context(self, handler):
         """Test building context about legacy entry"""
         entry = "## Version 1.2.0 - 2024-10-24\n\n### Added\n- Feature 1\n- Feature 2"
@@ -190,6 +197,42 @@ index abc123..def456 100644
         assert entry in prompt
         assert "Add webhook integration" in prompt
 
+    def test_conversion_prompt_includes_pr_diff(self, handler):
+        """Test that the relevance check shows the start of the PR diff"""
+        entry = "- Fixed login timeout"
+        context = handler.build_legacy_context(entry)
+        pr_diff = "+timeout = 30\n" + "x" * 5000
+
+        prompt = handler.create_conversion_prompt(
+            entry, {"title": "Fix login"}, context, pr_diff=pr_diff
+        )
+
+        assert "RELEVANCE CHECK" in prompt
+        assert "+timeout = 30" in prompt
+        assert "x" * 2000 not in prompt
+        assert "{pr_diff" not in prompt
+
+    def test_conversion_prompt_needs_no_generator(self, handler, monkeypatch):
+        """Test that the validation rules are built without a ChangelogGenerator"""
+        import changelog_generator
+
+        def fail(*args, **kwargs):
+            raise AssertionError("ChangelogGenerator should not be created")
+
+        monkeypatch.setattr(changelog_generator, "ChangelogGenerator", fail)
+        entry = "- Fixed login timeout"
+
+        prompt = handler.create_conversion_prompt(
+            entry,
+            {"title": "Fix login"},
+            handler.build_legacy_context(entry),
+            changelog_types=["fixed"],
+            forbidden_fields=["modules"],
+        )
+
+        assert "must be one of: fixed" in prompt
+        assert "- modules (forbidden by configuration)" in prompt
+
     def test_should_fail_on_conflict_true(self, handler):
         """Test conflict detection when both legacy and logchange exist"""
         legacy_files = ["CHANGELOG.md"]
@@ -249,6 +292,35 @@ index abc123..def456 100644
         assert len(context["summary"]) < len(long_entry)
         assert context["summary"].endswith("...")
 
+    def test_added_and_removed_line_positions(self, handler):
+        """Test that added lines use new line numbers and removed lines old ones"""
+        diff = """diff --git a/CHANGELOG.md b/CHANGELOG.md
+@@ -3,3 +3,3 @@
+ ## 1.0.0
+-- Old entry
++- New entry
+ - Unchanged
+"""
+        assert handler.extract_added_lines_with_positions(diff, "CHANGELOG.md") == [
+            (4, "- New entry")
+        ]
+        assert handler.extract_removed_lines_with_positions(diff, "CHANGELOG.md") == [
+            (4, "- Old entry")
+        ]
+        assert handler.extract_changelog_entry_from_diff(diff) == "- New entry"
+
+    def test_parsed_diff_reused_for_same_diff(self, handler):
+        """Test that the extract methods share one parse of the same diff"""
+        diff = "@@ -1 +1 @@\n+- Entry\n"
+
+        assert handler._parse_diff(diff) is handler._parse_diff(diff)
+
+        first = handler.extract_added_lines_with_positions(diff, "CHANGELOG.md")
+        first.append((99, "mutated"))
+        assert handler.extract_added_lines_with_positions(diff, "CHANGELOG.md") == [
+            (1, "- Entry")
+        ]
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -6,6 +6,7 @@ import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "action", "src"))
 
 import unittest
+from unittest.mock import patch
 
 from changelog_validator import ChangelogValidator
 
@@ -89,6 +90,41 @@ internal: true
         self.assertFalse(is_valid)
         self.assertIn("YAML must be a dictionary/object", errors)
 
+    def test_fast_fail_skips_field_checks(self):
+        """Test that fast_fail stops after a missing mandatory field"""
+        entry = {"type": "bogus", "authors": "not-a-list"}
+
+        _, full_errors = self.validator.validate_entry(entry)
+        is_valid, errors = ChangelogValidator(fast_fail=True).validate_entry(entry)
+
+        self.assertFalse(is_valid)
+        self.assertEqual(errors, ["Missing mandatory field: title"])
+        self.assertGreater(len(full_errors), len(errors))
+
+    def test_validate_reuses_cached_result(self):
+        """Test that identical content is only checked once"""
+        yaml_content = "title: Cached entry\ntype: unknown\n"
+        first = self.validator.validate(yaml_content)
+
+        with patch.object(self.validator, "validate_entry") as validate_entry:
+            second = self.validator.validate(yaml_content)
+
+        validate_entry.assert_not_called()
+        self.assertEqual(first, second)
+
+        # Callers mutating the returned errors must not corrupt the cache
+        second[1].clear()
+        self.assertEqual(self.validator.validate(yaml_content), first)
+
+    def test_validate_cache_is_bounded(self):
+        """Test that the oldest cached results are evicted"""
+        for i in range(ChangelogValidator.VALIDATION_CACHE_SIZE + 10):
+            self.validator.validate(f"title: Entry {i}\n")
+
+        self.assertEqual(
+            len(self.validator._cache), ChangelogValidator.VALIDATION_CACHE_SIZE
+        )
+
     def test_invalid_authors(self):
         """Test validation fails for invalid authors"""
         yaml_content = """
@@ -142,6 +178,28 @@ modules:
         self.assertFalse(is_valid)
         self.assertTrue(any("Unknown field: modules" in e for e in errors))
 
+    def test_unknown_fields_reported_in_entry_order(self):
+        """Test that unknown fields are reported in the order they appear"""
+        validator = ChangelogValidator(optional_fields=["type"])
+        entry = {"title": "Test", "links": [], "type": "added", "modules": []}
+
+        _, errors = validator.validate_entry(entry)
+
+        self.assertEqual(errors, ["Unknown field: links", "Unknown field: modules"])
+
+    def test_validate_entry_parsed_dict(self):
+        """Test validation of an already-parsed entry"""
+        entry = {"title": "Test", "type": "added", "authors": [{"name": "Dev"}]}
+        is_valid, errors = self.validator.validate_entry(entry)
+        self.assertTrue(is_valid)
+        self.assertEqual(errors, [])
+
+    def test_validate_entry_not_dict(self):
+        """Test validate_entry rejects non-mapping values"""
+        is_valid, errors = self.validator.validate_entry(["title"])
+        self.assertFalse(is_valid)
+        self.assertIn("YAML must be a dictionary/object", errors)
+
 
 if __name__ == "__main__":
     unittest.main()